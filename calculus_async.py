@@ -0,0 +1,102 @@
+"""
+calculus_async.py
+
+Асинхронный интерфейс к MathCalculator для программ на asyncio. Вычисления
+выполняются в пуле процессов calculus_pool.WorkerPool и не блокируют цикл
+событий:
+
+    async with AsyncMathCalculator(workers=4) as calc:
+        result = await calc.aintegrate("x**2", "x")
+
+Отмена задачи (task.cancel(), asyncio.wait_for) завершает процесс, который
+выполнял вычисление. Число одновременных вычислений ограничено
+max_concurrency; остальные вызовы ждут своей очереди, не занимая процессов.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from calculus_pool import WorkerPool
+
+
+class AsyncMathCalculator:
+    """
+    Асинхронные варианты операций MathCalculator (aderivative, aintegrate, ...).
+    pool — готовый WorkerPool (иначе создаётся собственный из workers процессов);
+    max_concurrency — предел одновременных вычислений (по умолчанию размер пула);
+    timeout — предельное время одного вычисления, с (None — без ограничения).
+    """
+
+    def __init__(self, pool: WorkerPool = None, workers: int = None, max_concurrency: int = None,
+                 timeout: float = None):
+        self._own_pool = pool is None
+        self.pool = pool if pool is not None else WorkerPool(workers)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency or self.pool.size
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Потоки только ждут ответа процесса, поэтому их число равно пределу вычислений
+        self._executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="calculus-async")
+        self.waiting = 0
+
+    async def run(self, op: str, *args, **kwargs):
+        """
+        Выполняет MathCalculator.<op>(*args, **kwargs) в пуле процессов.
+        Пока заняты все max_concurrency мест, вызов ждёт освобождения.
+        При отмене задачи процесс вычисления завершается.
+        """
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            cancel_event = threading.Event()
+            future = self._executor.submit(
+                self.pool.call, op, args, kwargs, timeout=self.timeout, cancel_event=cancel_event
+            )
+            waiter = asyncio.wrap_future(future)
+            try:
+                return await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                # Место освобождается только после остановки процесса
+                await asyncio.wait([waiter])
+                if not waiter.cancelled():
+                    waiter.exception()
+                raise
+        finally:
+            self._semaphore.release()
+
+    async def aderivative(self, expression: str, variable: str, **options) -> str:
+        """Асинхронный вариант MathCalculator.derivative."""
+        return await self.run("derivative", expression, variable, **options)
+
+    async def aintegrate(self, expression: str, variable: str, lower: str = None, upper: str = None,
+                         **options) -> str:
+        """Асинхронный вариант MathCalculator.integrate."""
+        return await self.run("integrate", expression, variable, lower, upper, **options)
+
+    async def acalculate(self, expression: str, substitutions: dict = None, **options):
+        """Асинхронный вариант MathCalculator.calculate."""
+        return await self.run("calculate", expression, substitutions, **options)
+
+    async def asimplify_expression(self, expression: str, **options) -> str:
+        """Асинхронный вариант MathCalculator.simplify_expression."""
+        return await self.run("simplify_expression", expression, **options)
+
+    async def aseries_expansion(self, expression: str, variable: str, n: int = 5, x0=0, **options) -> str:
+        """Асинхронный вариант MathCalculator.series_expansion."""
+        return await self.run("series_expansion", expression, variable, n, x0, **options)
+
+    def close(self):
+        """Останавливает потоки ожидания и собственный пул процессов."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._own_pool:
+            self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
@@ -8,37 +8,1082 @@ calculus_core.py
 - упрощение выражений,
 - разложение в ряд Тейлора (series).
 
+Запуск без аргументов выполняет демонстрационные примеры; пакетная обработка
+операций из файла JSONL (по одной на строку) с выводом результатов в JSONL:
+
+    python calculus_core.py batch operations.jsonl --workers 4 > results.jsonl
+
 Использует библиотеку SymPy. Обрабатывает типовые ошибки и возвращает текстовые сообщения.
 """
 
+import argparse
+import cmath
+import json
+import logging
+import math
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.util
+import os
+import queue
+import sys
+import threading
+import time
+import tokenize
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import sympy
-from sympy import Symbol, sympify, diff, integrate, simplify, series
+from sympy import Symbol, sympify, diff, integrate, simplify, series, lambdify
 from sympy.core.sympify import SympifyError
 
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен: без него используется модуль math
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Ограниченный потокобезопасный LRU-кэш со статистикой попаданий и вытеснений.
+    Ёмкость 0 отключает хранение записей.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Возвращает значение по ключу (и отмечает его как недавно использованное)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Сохраняет значение, вытесняя самые давние записи сверх ёмкости."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._evict(self.maxsize)
+
+    def _evict(self, maxsize):
+        while len(self._entries) > max(maxsize, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int):
+        """Меняет ёмкость кэша, вытесняя самые старые записи при необходимости."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict(maxsize)
+
+    def clear(self):
+        """Очищает кэш и сбрасывает статистику."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> dict:
+        """Возвращает статистику кэша."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ParseCache(LRUCache):
+    """
+    Кэш результатов разбора выражений.
+    Ключ — исходное значение вместе с параметрами разбора. Сообщения об ошибках
+    синтаксиса кэшируются наравне с успешными результатами, поэтому
+    некорректный ввод повторно в парсер не попадает.
+    """
+
+    @staticmethod
+    def make_key(value, options: dict):
+        """Строит ключ кэша; возвращает None, если значение нехешируемо."""
+        key = (type(value), value, tuple(sorted(options.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get_or_parse(self, value, parse, **options):
+        """Возвращает закэшированную пару (результат, ошибка) или вызывает parse(value, **options)."""
+        key = self.make_key(value, options)
+        if key is None or self.maxsize <= 0:
+            return parse(value, **options)
+        result = self.get(key, _MISSING)
+        if result is _MISSING:
+            # Разбор выполняется вне блокировки, чтобы не сериализовать потоки
+            result = parse(value, **options)
+            self.put(key, result)
+        return result
+
+
+class ResultCache(LRUCache):
+    """
+    Кэш результатов тяжёлых операций (производная, интеграл, упрощение, ряд).
+    Ключ — имя операции и srepr-представления разобранных аргументов.
+    Необязательное постоянное хранилище store (объект с методами get/put,
+    например calculus_store.SQLiteResultStore) сохраняет результаты между
+    перезапусками процесса.
+    """
+
+    def __init__(self, maxsize: int = 1024, store=None):
+        super().__init__(maxsize)
+        self.store = store
+        self.store_hits = 0
+
+    @staticmethod
+    def make_key(operation: str, parts) -> str:
+        """Строит канонический ключ из имени операции и аргументов."""
+        return "\x1f".join([operation] + [sympy.srepr(p) for p in parts])
+
+    def lookup(self, key):
+        """Ищет результат в памяти, затем в постоянном хранилище; при промахе возвращает None."""
+        result = self.get(key)
+        if result is None and self.store is not None:
+            result = self.store.get(key)
+            if result is not None:
+                with self._lock:
+                    self.store_hits += 1
+                super().put(key, result)
+        return result
+
+    def put(self, key, value):
+        super().put(key, value)
+        if self.store is not None:
+            self.store.put(key, value)
+
+    def clear(self):
+        """Очищает кэш в памяти (постоянное хранилище не затрагивается)."""
+        super().clear()
+        self.store_hits = 0
+
+    def info(self) -> dict:
+        info = super().info()
+        info["store_hits"] = self.store_hits
+        return info
+
+
+class TimingStats:
+    """Потокобезопасные счётчики числа вызовов и суммарного времени по категориям."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, category: str, seconds: float):
+        with self._lock:
+            calls, total = self._stats.get(category, (0, 0.0))
+            self._stats[category] = (calls + 1, total + seconds)
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+    def info(self) -> dict:
+        """Возвращает {категория: {"calls", "seconds", "mean"}}."""
+        with self._lock:
+            return {
+                category: {"calls": calls, "seconds": total, "mean": total / calls}
+                for category, (calls, total) in self._stats.items()
+            }
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных вычислений: пока вычисление с данным
+    ключом выполняется, повторные вызовы do() с тем же ключом не запускают
+    новое, а ждут и получают его результат (или его исключение).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.calls = 0
+        self.executions = 0
+
+    def do(self, key, compute):
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.executions += 1
+        if leader:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        return future.result()
+
+    def info(self) -> dict:
+        """Возвращает число вызовов, фактических вычислений и сэкономленных вычислений."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "shared": self.calls - self.executions,
+                "inflight": len(self._inflight),
+            }
+
+
+class CompiledExpression:
+    """
+    Выражение, скомпилированное через lambdify в числовую функцию.
+    Аргументы передаются в порядке names.
+    """
+
+    def __init__(self, expr, symbols, backend: str):
+        self.expr = expr
+        self.symbols = tuple(symbols)
+        self.names = tuple(str(sym) for sym in self.symbols)
+        self.backend = backend
+        started = time.perf_counter()
+        # cse=True: повторяющиеся подвыражения вычисляются один раз
+        self.func = lambdify(self.symbols, expr, modules=backend, cse=True)
+        self.compile_time = time.perf_counter() - started
+
+    def __call__(self, *values):
+        if self.backend == "numpy":
+            # Выход из области определения даёт nan, а не предупреждение
+            with np.errstate(all="ignore"):
+                return self.func(*values)
+        return self.func(*values)
+
+
+class AnnotatedResult(str):
+    """Строка результата с дополнительными сведениями о вычислении в атрибуте info."""
+
+    def __new__(cls, text, **info):
+        obj = super().__new__(cls, text)
+        obj.info = info
+        return obj
+
+
+class TimeoutResult(AnnotatedResult):
+    """Результат вычисления, прерванного по истечении отведённого времени."""
+
+    def __new__(cls, operation: str, seconds: float):
+        return super().__new__(
+            cls, f"Ошибка: превышено время вычисления ({seconds:g} с)",
+            status="timeout", operation=operation, timeout=seconds,
+        )
+
+    def __reduce__(self):
+        return TimeoutResult, (self.info["operation"], self.info["timeout"])
+
+
+class CalculationTimeout(Exception):
+    """Вычисление не уложилось в отведённое время и было прервано."""
+
+    def __init__(self, operation: str, seconds: float):
+        super().__init__(f"{operation}: превышено время вычисления ({seconds:g} с)")
+        self.operation = operation
+        self.seconds = seconds
+
+    def result(self) -> TimeoutResult:
+        return TimeoutResult(self.operation, self.seconds)
+
+
+def _mp_context():
+    """Контекст multiprocessing: fork на Linux (SymPy уже импортирован), иначе spawn."""
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+def _exit_with_parent(parent_pid: int):
+    """Завершает процесс, если родитель исчез (например, был убит, не успев прервать вычисление)."""
+    while os.getppid() == parent_pid:
+        time.sleep(0.5)
+    os._exit(1)
+
+
+def _stop_process(process):
+    """Завершает процесс: сначала terminate, при необходимости kill."""
+    if process.is_alive():
+        process.terminate()
+        process.join(1)
+        if process.is_alive():
+            process.kill()
+    process.join()
+
+
+def _call_in_child(conn, func, args, kwargs, parent_pid: int = None):
+    """Точка входа дочернего процесса KillableCall: отправляет (успех, значение) в канал."""
+    if parent_pid is not None:
+        threading.Thread(target=_exit_with_parent, args=(parent_pid,), daemon=True).start()
+    try:
+        outcome = (True, func(*args, **kwargs))
+    except BaseException as e:
+        outcome = (False, e)
+    try:
+        conn.send(outcome)
+    except Exception as e:
+        # Исключение или результат не сериализуются — передаём текст ошибки
+        conn.send((False, RuntimeError(str(e))))
+    finally:
+        conn.close()
+
+
+class KillableCall:
+    """
+    Вызов функции в отдельном процессе, который можно прервать в любой момент.
+    Функция и аргументы должны сериализоваться через pickle.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        ctx = _mp_context()
+        self._conn, child_conn = ctx.Pipe(duplex=False)
+        # Процесс не демонический: демонам запрещено порождать процессы, а функция
+        # сама может выполнять вычисления с ограничением времени. Если родитель
+        # завершается раньше, процесс останавливает финализатор.
+        self.process = ctx.Process(target=_call_in_child, args=(child_conn, func, args, kwargs, os.getpid()))
+        self.process.start()
+        child_conn.close()
+        self._finalizer = multiprocessing.util.Finalize(self, _stop_process, args=(self.process,), exitpriority=10)
+        self._outcome = None
+
+    def wait(self, timeout: float = None) -> bool:
+        """Ждёт завершения не дольше timeout секунд; возвращает True, если результат готов."""
+        if self._outcome is None:
+            try:
+                if not self._conn.poll(timeout):
+                    return False
+                self._outcome = self._conn.recv()
+            except (EOFError, OSError):
+                self._outcome = (False, RuntimeError("процесс вычисления завершился аварийно"))
+            self._finalizer()
+            self._conn.close()
+        return True
+
+    def done(self) -> bool:
+        return self.wait(0)
+
+    def result(self):
+        """Возвращает результат функции или возбуждает её исключение."""
+        self.wait()
+        ok, value = self._outcome
+        if ok:
+            return value
+        raise value
+
+    def cancel(self):
+        """Немедленно завершает процесс вычисления."""
+        if self._outcome is not None:
+            return
+        self._finalizer()
+        self._conn.close()
+        self._outcome = (False, RuntimeError("вычисление отменено"))
+
+
+class TaylorJet:
+    """
+    Усечённый ряд Тейлора c_0 + c_1*h + ... + c_n*h**n с коэффициентами-массивами NumPy.
+    Арифметика над такими рядами реализует автоматическое дифференцирование
+    вперёд: производная порядка k в точке равна k! * c_k. Операции применяются
+    поэлементно ко всем точкам сразу.
+    """
+
+    __slots__ = ("c",)
+
+    def __init__(self, coefficients):
+        self.c = coefficients
+
+    @property
+    def order(self) -> int:
+        return len(self.c) - 1
+
+    @classmethod
+    def constant(cls, value, shape, order: int):
+        zeros = np.zeros(shape)
+        return cls([np.full(shape, value, dtype=np.float64)] + [zeros] * order)
+
+    @classmethod
+    def variable(cls, points, order: int):
+        points = np.asarray(points, dtype=np.float64)
+        coefficients = [points]
+        if order >= 1:
+            coefficients.append(np.ones(points.shape))
+        coefficients += [np.zeros(points.shape)] * (order - 1)
+        return cls(coefficients)
+
+    def __add__(self, other):
+        return TaylorJet([a + b for a, b in zip(self.c, other.c)])
+
+    def __neg__(self):
+        return TaylorJet([-a for a in self.c])
+
+    def __mul__(self, other):
+        a, b = self.c, other.c
+        return TaylorJet([sum(a[j] * b[k - j] for j in range(k + 1)) for k in range(len(a))])
+
+    def __truediv__(self, other):
+        a, b = self.c, other.c
+        c = []
+        for k in range(len(a)):
+            c.append((a[k] - sum(b[j] * c[k - j] for j in range(1, k + 1))) / b[0])
+        return TaylorJet(c)
+
+    def reciprocal(self):
+        return TaylorJet.constant(1.0, self.c[0].shape, self.order) / self
+
+    def _integral(self, value0, derivative):
+        """Ряд для f(a) по значению f(a_0) и ряду f'(a): (f(a))' = f'(a) * a'."""
+        a, g = self.c, derivative.c
+        c = [value0]
+        for k in range(1, len(a)):
+            c.append(sum(j * a[j] * g[k - j] for j in range(1, k + 1)) / k)
+        return TaylorJet(c)
+
+    def exp(self):
+        a = self.c
+        c = [np.exp(a[0])]
+        for k in range(1, len(a)):
+            c.append(sum(j * a[j] * c[k - j] for j in range(1, k + 1)) / k)
+        return TaylorJet(c)
+
+    def log(self):
+        a = self.c
+        c = [np.log(a[0])]
+        for k in range(1, len(a)):
+            c.append((a[k] - sum(j * c[j] * a[k - j] for j in range(1, k)) / k) / a[0])
+        return TaylorJet(c)
+
+    def _sincos(self, sign: int, sin0, cos0):
+        a = self.c
+        s, co = [sin0], [cos0]
+        for k in range(1, len(a)):
+            s.append(sum(j * a[j] * co[k - j] for j in range(1, k + 1)) / k)
+            co.append(sign * sum(j * a[j] * s[k - j] for j in range(1, k + 1)) / k)
+        return TaylorJet(s), TaylorJet(co)
+
+    def sincos(self):
+        return self._sincos(-1, np.sin(self.c[0]), np.cos(self.c[0]))
+
+    def sinhcosh(self):
+        return self._sincos(1, np.sinh(self.c[0]), np.cosh(self.c[0]))
+
+    def power(self, p: float):
+        """Возведение в постоянную вещественную степень."""
+        a = self.c
+        c = [np.power(a[0], p)]
+        for k in range(1, len(a)):
+            c.append(sum((p * j - (k - j)) * a[j] * c[k - j] for j in range(1, k + 1)) / (k * a[0]))
+        return TaylorJet(c)
+
+    def integer_power(self, n: int):
+        """Возведение в целую степень (корректно и при нулевом свободном члене)."""
+        if n < 0:
+            return self.integer_power(-n).reciprocal()
+        result = TaylorJet.constant(1.0, self.c[0].shape, self.order)
+        base = self
+        while n:
+            if n & 1:
+                result = result * base
+            n >>= 1
+            if n:
+                base = base * base
+        return result
+
+    def abs(self):
+        sign = np.sign(self.c[0])
+        return TaylorJet([sign * a for a in self.c])
+
+    def derivatives(self):
+        """Возвращает массив производных порядков 0..n (k! * c_k)."""
+        return np.stack([math.factorial(k) * a for k, a in enumerate(self.c)])
+
+
+def _taylor_evaluate(expr, var, points, order: int, constants: dict) -> TaylorJet:
+    """Вычисляет усечённый ряд Тейлора выражения в точках points обходом дерева выражения."""
+    shape = np.shape(points)
+    memo = {}
+
+    def const(value):
+        return TaylorJet.constant(value, shape, order)
+
+    def one_minus_square(a, sign=1):
+        return const(1.0) + (-(a * a) if sign > 0 else a * a)
+
+    def real_constant(node) -> float:
+        # Комплексные значения ряды не представляют — мнимая часть не отбрасывается молча
+        value = complex(node.subs(constants).evalf())
+        if value.imag != 0:
+            raise ValueError(f"константа {node} не вещественна")
+        return value.real
+
+    def visit(node):
+        if node in memo:
+            return memo[node]
+        if node == var:
+            result = TaylorJet.variable(points, order)
+        elif var not in node.free_symbols:
+            # Поддерево не зависит от переменной — это константа
+            result = const(real_constant(node))
+        elif node.is_Add:
+            terms = [visit(arg) for arg in node.args]
+            result = terms[0]
+            for term in terms[1:]:
+                result = result + term
+        elif node.is_Mul:
+            factors = [visit(arg) for arg in node.args]
+            result = factors[0]
+            for factor in factors[1:]:
+                result = result * factor
+        elif node.is_Pow:
+            base, exponent = node.args
+            if exponent.is_Integer:
+                result = visit(base).integer_power(int(exponent))
+            elif var not in exponent.free_symbols:
+                result = visit(base).power(real_constant(exponent))
+            else:
+                result = (visit(exponent) * visit(base).log()).exp()
+        else:
+            result = visit_function(node)
+        memo[node] = result
+        return result
+
+    def visit_function(node):
+        if len(node.args) != 1:
+            raise NotImplementedError(f"функция {node.func} не поддерживается")
+        a = visit(node.args[0])
+        a0 = a.c[0]
+        name = node.func.__name__
+        if name == "exp":
+            return a.exp()
+        if name == "log":
+            return a.log()
+        if name in ("sin", "cos", "tan", "cot", "sec", "csc"):
+            s, c = a.sincos()
+            return {"sin": s, "cos": c, "tan": s / c if name == "tan" else None,
+                    "cot": c / s if name == "cot" else None,
+                    "sec": c.reciprocal() if name == "sec" else None,
+                    "csc": s.reciprocal() if name == "csc" else None}[name]
+        if name in ("sinh", "cosh", "tanh"):
+            s, c = a.sinhcosh()
+            return {"sinh": s, "cosh": c, "tanh": s / c if name == "tanh" else None}[name]
+        if name == "Abs":
+            return a.abs()
+        if name == "atan":
+            return a._integral(np.arctan(a0), (const(1.0) + a * a).reciprocal())
+        if name == "asin":
+            return a._integral(np.arcsin(a0), one_minus_square(a).power(-0.5))
+        if name == "acos":
+            return a._integral(np.arccos(a0), -one_minus_square(a).power(-0.5))
+        if name == "asinh":
+            return a._integral(np.arcsinh(a0), (const(1.0) + a * a).power(-0.5))
+        if name == "acosh":
+            return a._integral(np.arccosh(a0), (a * a + const(-1.0)).power(-0.5))
+        if name == "atanh":
+            return a._integral(np.arctanh(a0), one_minus_square(a).reciprocal())
+        raise NotImplementedError(f"функция {name} не поддерживается")
+
+    with np.errstate(all="ignore"):
+        return visit(expr)
+
+
+class DerivativeChain:
+    """
+    Цепочка последовательных производных выражения по переменной.
+    Производная порядка k+1 получается одним дифференцированием из уже
+    найденной производной порядка k. Хранится не более max_length производных;
+    более высокие порядки вычисляются от последней сохранённой без запоминания.
+    """
+
+    def __init__(self, expr, var, simplify_steps: bool = False, max_length: int = 64):
+        self.var = var
+        self.simplify_steps = simplify_steps
+        self.max_length = max_length
+        self._derivatives = [expr]
+        self._lock = threading.Lock()
+
+    def _step(self, expr):
+        result = diff(expr, self.var)
+        # Упрощение между шагами сдерживает разрастание выражений
+        return simplify(result) if self.simplify_steps else result
+
+    def get(self, order: int):
+        """Возвращает производную порядка order (0 — само выражение)."""
+        if order < 0:
+            raise ValueError("порядок производной не может быть отрицательным")
+        with self._lock:
+            while len(self._derivatives) <= min(order, self.max_length):
+                self._derivatives.append(self._step(self._derivatives[-1]))
+            if order < len(self._derivatives):
+                return self._derivatives[order]
+            result = self._derivatives[-1]
+        for _ in range(order - len(self._derivatives) + 1):
+            result = self._step(result)
+        return result
+
+    def __len__(self):
+        return len(self._derivatives)
+
+
+class TaylorSeries:
+    """
+    Ряд Тейлора выражения по переменной в точке x0 с ленивым вычислением.
+    Коэффициенты вычисляются по мере запроса и запоминаются: переход к
+    следующему порядку стоит одного дифференцирования. Устранимые особенности
+    в точке x0 обрабатываются через предел; если функция не аналитична в x0,
+    возбуждается ValueError.
+    """
+
+    def __init__(self, expr, var, x0=0):
+        self.expr = expr
+        self.var = var
+        self.x0 = sympify(x0)
+        self._coefficients = []
+        self._current = expr
+        self._lock = threading.Lock()
+
+    def _next_coefficient(self):
+        k = len(self._coefficients)
+        if k > 0:
+            self._current = diff(self._current, self.var)
+        value = self._current.subs(self.var, self.x0)
+        if value.has(sympy.nan, sympy.zoo, sympy.oo, -sympy.oo):
+            value = sympy.limit(self._current, self.var, self.x0)
+            if value.has(sympy.nan, sympy.zoo, sympy.oo, -sympy.oo, sympy.AccumBounds):
+                raise ValueError(f"выражение не аналитично в точке {self.x0}")
+        self._coefficients.append(value / sympy.factorial(k))
+
+    def coefficient(self, k: int):
+        """Возвращает коэффициент при (var - x0)**k."""
+        with self._lock:
+            while len(self._coefficients) <= k:
+                self._next_coefficient()
+            return self._coefficients[k]
+
+    def coefficients(self, n: int) -> list:
+        """Возвращает первые n коэффициентов."""
+        if n > 0:
+            self.coefficient(n - 1)
+        return self._coefficients[:n]
+
+    def __iter__(self):
+        """Бесконечный генератор коэффициентов c_0, c_1, ..."""
+        k = 0
+        while True:
+            yield self.coefficient(k)
+            k += 1
+
+    def polynomial(self, n: int):
+        """Многочлен Тейлора из первых n членов (как series(expr, var, x0, n).removeO())."""
+        shift = self.var - self.x0
+        return sympy.Add(*[c * shift ** k for k, c in enumerate(self.coefficients(n))])
+
+    def __len__(self):
+        return len(self._coefficients)
+
+
+_RING_SERIES_FUNCTIONS = ("exp", "log", "sin", "cos", "tan", "sinh", "cosh", "tanh", "atan")
+
+
+def _ring_series(expr, var, n: int, x0=0):
+    """
+    Разлагает выражение в ряд Тейлора до порядка n через усечённую арифметику
+    разреженных многочленов (sympy.polys.ring_series). Поддерживаются +, *,
+    степени и функции из _RING_SERIES_FUNCTIONS; для прочих выражений и
+    неаналитичных в x0 случаев возбуждается NotImplementedError.
+    """
+    from sympy.polys import ring_series as rs
+    from sympy.polys.rings import ring
+
+    shifted = expr.xreplace({var: var + x0}) if x0 != 0 else expr
+    rational = all(atom.is_Rational for atom in shifted.atoms(sympy.Number)) and \
+        not shifted.atoms(sympy.NumberSymbol) and shifted.free_symbols <= {var}
+
+    def expand_in(domain):
+        R, t = ring(str(var), domain)
+        memo = {}
+
+        def visit(node):
+            if node in memo:
+                return memo[node]
+            if node == var:
+                result = t
+            elif var not in node.free_symbols:
+                result = R(node)
+            elif node.is_Add:
+                result = R(0)
+                for arg in node.args:
+                    result += visit(arg)
+            elif node.is_Mul:
+                result = R(1)
+                for arg in node.args:
+                    result = rs.rs_mul(result, visit(arg), t, n)
+            elif node.is_Pow and node.exp.is_Rational:
+                base = visit(node.base)
+                if not (node.exp.is_Integer and node.exp >= 0) and \
+                        (not base or min(monom[0] for monom in base.keys()) > 0):
+                    # Отрицательная или дробная степень ряда без свободного члена даёт
+                    # ряд Лорана/Пюизё; при умножении на усечённые до порядка n
+                    # множители старшие члены произведения были бы потеряны
+                    raise NotImplementedError("особенность в точке разложения")
+                if node.exp.is_Integer and node.exp >= 0:
+                    result = rs.rs_pow(base, int(node.exp), t, n)
+                elif node.exp.is_Integer:
+                    result = rs.rs_series_inversion(rs.rs_pow(base, int(-node.exp), t, n), t, n)
+                else:
+                    result = rs.rs_pow(base, node.exp, t, n)
+            elif node.is_Function and node.func.__name__ in _RING_SERIES_FUNCTIONS and len(node.args) == 1:
+                result = getattr(rs, "rs_" + node.func.__name__)(visit(node.args[0]), t, n)
+            else:
+                raise NotImplementedError(f"{node.func} не поддерживается кольцевыми рядами")
+            memo[node] = result
+            return result
+
+        return visit(shifted).as_expr()
+
+    if rational:
+        try:
+            result = expand_in(sympy.QQ)
+        except NotImplementedError:
+            raise
+        except Exception:
+            # Иррациональные коэффициенты (например, log(2)) требуют домена EX
+            result = expand_in(sympy.EX)
+    else:
+        result = expand_in(sympy.EX)
+    return result.xreplace({var: var - x0}) if x0 != 0 else result
+
+
+def _fft_taylor(func, x0: complex, n: int, radius: float = None):
+    """
+    Численно находит первые n коэффициентов Тейлора аналитической функции func
+    в точке x0 по формуле Коши: значения на окружности радиуса r вокруг x0
+    переводятся в коэффициенты быстрым преобразованием Фурье.
+
+    Радиус (если не задан) увеличивается от 2**-8 до 2**8, пока функция конечна
+    на окружности, главная часть ряда Лорана пренебрежимо мала и младшие
+    коэффициенты не расходятся с уже принятыми (иначе внутри окружности
+    оказалась особенность). Каждый коэффициент берётся с того
+    принятого радиуса, где его оценка погрешности наименьшая. Оценка
+    погрешности коэффициента — расхождение между N и 2N узлами плюс ошибка
+    округления eps * max|f| / r**k.
+    Возвращает (коэффициенты, оценки погрешности, наибольший принятый радиус).
+    """
+    samples = 1 << max(5, (2 * n - 1).bit_length())
+    k = np.arange(n)
+    eps = np.finfo(np.float64).eps
+
+    def at_radius(r, count):
+        nodes = x0 + r * np.exp(2j * np.pi * np.arange(count) / count)
+        values = np.asarray(func(nodes), dtype=np.complex128) * np.ones(count)
+        if not np.all(np.isfinite(values)):
+            return None
+        spectrum = np.fft.fft(values) / count
+        scale = np.max(np.abs(values))
+        # Внутри окружности есть особенность, если у ряда Лорана заметна главная часть
+        if np.max(np.abs(spectrum[-min(n, 4):])) > 1e-6 * max(scale, 1e-300):
+            return None
+        return spectrum[:n] / r ** k, scale
+
+    def estimate(r):
+        with np.errstate(all="ignore"):
+            coarse, fine = at_radius(r, samples), at_radius(r, 2 * samples)
+            if coarse is None or fine is None:
+                return None
+            coefficients, scale = fine
+            errors = np.abs(coarse[0] - coefficients) + eps * max(scale, 1.0) / r ** k
+        # Старшие коэффициенты на малых радиусах переполняются: они считаются
+        # неизвестными (с бесконечной погрешностью), младшие должны быть конечны
+        finite = np.isfinite(coefficients) & np.isfinite(errors)
+        if not np.all(finite[:min(n, 4)]):
+            return None
+        return np.where(finite, coefficients, 0), np.where(finite, errors, np.inf)
+
+    if radius is not None:
+        result = estimate(radius)
+        if result is None:
+            raise ValueError(f"функция не конечна на окружности радиуса {radius}")
+        return result[0], result[1], radius
+
+    low = min(n, 4)
+
+    def consistent(candidate, reference):
+        """Младшие коэффициенты двух оценок совпадают в пределах их погрешностей."""
+        (c1, e1), (c2, e2) = candidate, reference
+        drift = np.abs(c1[:low] - c2[:low])
+        scale = np.max(np.abs(c2[:low])) + 1e-300
+        return bool(np.all(drift <= 1e-6 * scale + 10 * (e1[:low] + e2[:low])))
+
+    # Исходный радиус 2**-8 проверяется сравнением с вдвое меньшим
+    exponent = -8.0
+    current, inner = estimate(2.0 ** exponent), estimate(2.0 ** (exponent - 1))
+    if current is None or inner is None or not consistent(current, inner):
+        raise ValueError("не удалось подобрать радиус: функция не аналитична вблизи точки")
+    # Радиус растёт с шагом 2**(1/4) до первой окружности, на которой функция не
+    # конечна или младшие коэффициенты расходятся с лучшими принятыми (внутрь
+    # попала особенность). Каждый коэффициент берётся с того принятого радиуса,
+    # где его оценка погрешности наименьшая
+    coefficients, errors = current
+    radius = 2.0 ** exponent
+    while exponent < 8:
+        exponent += 0.25
+        candidate = estimate(2.0 ** exponent)
+        if candidate is None or not consistent(candidate, (coefficients, errors)):
+            break
+        better = candidate[1] < errors
+        coefficients = np.where(better, candidate[0], coefficients)
+        errors = np.where(better, candidate[1], errors)
+        radius = 2.0 ** exponent
+    return coefficients, errors, radius
+
+
+def _as_completed(calls: dict, timeout: float = None):
+    """
+    Выдаёт пары (имя, KillableCall) из словаря calls по мере завершения вызовов,
+    но не дольше timeout секунд. Незавершённые вызовы отменяет вызывающий код.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = dict(calls)
+    while pending:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return
+        ready = multiprocessing.connection.wait([call._conn for call in pending.values()], remaining)
+        for name, call in list(pending.items()):
+            if call._conn in ready:
+                call.wait()
+                del pending[name]
+                yield name, call
+
+
 class MathCalculator:
     """
     Класс для символьных математических вычислений.
     Методы:
-    - derivative(expression, variable)
-    - calculate(expression, substitutions=None)
-    - integrate(expression, variable, lower=None, upper=None)
-    - simplify_expression(expression)
-    - series_expansion(expression, variable, n=5, x0=0)
+    - derivative(expression, variable, cse=False)
+    - derivative_n(expression, variable, order, simplify_steps=False)
+    - derivative_values(expression, variable, points, order=1, substitutions=None)
+    - gradient(expression, variables=None, cse=False)
+    - jacobian(expressions, variables=None, cse=False)
+    - hessian(expression, variables=None, cse=False)
+    - calculate(expression, substitutions=None, compiled=False)
+    - calculate_many(expression, arrays, complex_results=False)
+    - calculate_batch(expression, rows, chunk_size=None)
+    - adaptive_samples(expression, variable, a, b, initial=257, max_points=100000)
+    - compile_expression(expression, variables=None)
+    - integrate(expression, variable, lower=None, upper=None, timeout=None, numeric_fallback=False,
+                race_strategies=False, cse=False)
+    - simplify_expression(expression, timeout=None, fast=False)
+    - series_expansion(expression, variable, n=5, x0=0, incremental=False, backend="auto")
+    - taylor_series(expression, variable, x0=0)
+
+    Результаты разбора строк кэшируются в MathCalculator.parse_cache.
+    Кэш результатов тяжёлых операций включается вызовом enable_result_cache(),
+    объединение одинаковых одновременных вычислений — enable_single_flight().
+
+    integrate и simplify_expression принимают ограничение времени в секундах;
+    по умолчанию используется MathCalculator.default_timeout (переменная
+    окружения CALCULUS_TIMEOUT). Вычисление с ограничением выполняется в
+    отдельном процессе, который завершается по истечении времени, а метод
+    возвращает TimeoutResult.
     """
 
+    parse_cache = ParseCache()
+    result_cache = None
+    single_flight = None
+    compiled_cache = LRUCache(256)
+    derivative_chains = LRUCache(128)
+    taylor_cache = LRUCache(128)
+    timing_stats = TimingStats()
+    default_timeout = float(os.environ["CALCULUS_TIMEOUT"]) if os.environ.get("CALCULUS_TIMEOUT") else None
+    symbolic_budget = 2.0
+    integration_strategies = ("default", "risch", "meijerg", "manual", "heurisch")
+    race_grace = 0.5
+    simplify_strategies = ("trigsimp", "radsimp", "cancel", "powsimp", "factor")
+    fast_simplify_budget = 1.0
+
+    @staticmethod
+    def enable_result_cache(maxsize: int = 1024, store=None) -> ResultCache:
+        """
+        Включает мемоизацию derivative, integrate, simplify_expression и series_expansion.
+        store — объект постоянного хранилища или путь к файлу SQLite.
+        """
+        if isinstance(store, str):
+            from calculus_store import SQLiteResultStore
+            store = SQLiteResultStore(store)
+        MathCalculator.result_cache = ResultCache(maxsize, store)
+        return MathCalculator.result_cache
+
+    @staticmethod
+    def disable_result_cache():
+        """Отключает мемоизацию результатов."""
+        MathCalculator.result_cache = None
+
+    @staticmethod
+    def enable_single_flight() -> SingleFlight:
+        """
+        Включает объединение одновременных вызовов derivative, integrate,
+        simplify_expression и series_expansion с одинаковыми (после разбора) аргументами
+        и параметрами вызова (ограничение времени, режим):
+        вычисление выполняется один раз, все вызовы получают его результат.
+        """
+        MathCalculator.single_flight = SingleFlight()
+        return MathCalculator.single_flight
+
+    @staticmethod
+    def disable_single_flight():
+        """Отключает объединение одновременных вычислений."""
+        MathCalculator.single_flight = None
+
     @staticmethod
-    def _safe_sympify(value):
+    def _memoized(operation: str, parts, compute, cacheable=None, mode=None):
+        """
+        Возвращает результат compute() с учётом кэша результатов и объединения
+        одновременных вычислений. Исключения из compute() не кэшируются и
+        передаются вызывающему коду; cacheable(result) позволяет отказаться
+        от сохранения отдельных результатов. mode — параметры вызова, от которых
+        зависит результат, но не ключ кэша (ограничение времени, численный
+        запасной путь и т.п.): объединяются только вызовы с одинаковым mode.
+        """
+        cache = MathCalculator.result_cache
+        flight = MathCalculator.single_flight
+        if cache is None and flight is None:
+            return compute()
+        key = ResultCache.make_key(operation, parts)
+        result = cache.lookup(key) if cache is not None else None
+        if result is None:
+            if flight is None:
+                result = compute()
+            else:
+                result = flight.do(key if mode is None else f"{key}\x1f{mode}", compute)
+            if cache is not None and (cacheable is None or cacheable(result)):
+                cache.put(key, result)
+        return result
+
+    @staticmethod
+    def normalized_key(operation: str, values) -> str:
+        """
+        Ключ вызова для объединения одинаковых запросов: строки приводятся
+        к последовательности лексем без лишних пробелов (так "x**2+1" и
+        "x ** 2 + 1" дают один ключ), прочие значения — JSON. Выражения не
+        разбираются: ключ строится за линейное время и без вычислений.
+        """
+        parts = [operation]
+        for value in values:
+            if isinstance(value, str):
+                parts.append(MathCalculator._token_text(value))
+            else:
+                parts.append(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str))
+        return "\x1f".join(parts)
+
+    @staticmethod
+    def _token_text(value: str) -> str:
+        """Строка из лексем value, разделённых одним пробелом; при ошибке разбора — исходная строка."""
+        lines = iter(value.splitlines(keepends=True))
+        try:
+            return " ".join(token.string for token in tokenize.generate_tokens(lambda: next(lines, ""))
+                            if token.string.strip())
+        except (tokenize.TokenError, SyntaxError):
+            return value
+
+    @staticmethod
+    def _safe_sympify(value, **options):
         """Вспомогательный метод для безопасного преобразования строки в символьный объект."""
+        return MathCalculator.parse_cache.get_or_parse(value, MathCalculator._parse, **options)
+
+    @staticmethod
+    def parse_expression(expression: str):
+        """Разбирает выражение с использованием кэша; возвращает кортеж (выражение, None) или (None, ошибка)."""
+        return MathCalculator._safe_sympify(expression)
+
+    @staticmethod
+    def _parse(value, **options):
+        """Разбирает значение без кэширования; возвращает пару (результат, ошибка)."""
         try:
-            return sympify(value), None
+            return sympify(value, **options), None
         except SympifyError:
             return None, "Ошибка: некорректный синтаксис выражения"
         except Exception as e:
             return None, f"Ошибка: {str(e)}"
 
     @staticmethod
-    def derivative(expression: str, variable: str) -> str:
-        """Вычисляет производную выражения по переменной."""
+    def _format_result(expr, use_cse: bool = False) -> str:
+        """
+        Переводит результат в строку. При use_cse=True общие подвыражения
+        выносятся во временные переменные: строки вида "x0 = ..." и последней
+        строкой итоговое выражение; замены и итог дублируются в info.
+        """
+        if not use_cse:
+            return str(expr)
+        replacements, (reduced,) = sympy.cse([expr])
+        replacements = [(str(sym), str(value)) for sym, value in replacements]
+        lines = [f"{sym} = {value}" for sym, value in replacements] + [str(reduced)]
+        return AnnotatedResult("\n".join(lines), replacements=replacements, result=str(reduced))
+
+    @staticmethod
+    def derivative(expression: str, variable: str, cse: bool = False) -> str:
+        """
+        Вычисляет производную выражения по переменной.
+        При cse=True результат возвращается в форме с общими подвыражениями (см. _format_result).
+        """
+        var, error = MathCalculator._safe_sympify(variable)
+        if error:
+            return error
+        expr, error = MathCalculator._safe_sympify(expression)
+        if error:
+            return error
+        try:
+            return MathCalculator._memoized(
+                "derivative:cse" if cse else "derivative", (expr, var),
+                lambda: MathCalculator._format_result(diff(expr, var), cse),
+            )
+        except Exception as e:
+            return f"Ошибка: невозможно вычислить производную ({str(e)})"
+
+    @staticmethod
+    def _derivative_chain(expr, var, simplify_steps: bool = False) -> DerivativeChain:
+        """Возвращает (создавая при необходимости) цепочку производных из MathCalculator.derivative_chains."""
+        key = (sympy.srepr(expr), sympy.srepr(var), simplify_steps)
+        chain = MathCalculator.derivative_chains.get(key)
+        if chain is None:
+            chain = DerivativeChain(expr, var, simplify_steps)
+            MathCalculator.derivative_chains.put(key, chain)
+        return chain
+
+    @staticmethod
+    def derivative_n(expression: str, variable: str, order: int, simplify_steps: bool = False) -> str:
+        """
+        Вычисляет производную порядка order. Промежуточные производные сохраняются,
+        поэтому запрос следующего порядка стоит одного дифференцирования.
+        simplify_steps=True упрощает результат после каждого шага.
+        """
         var, error = MathCalculator._safe_sympify(variable)
         if error:
             return error
@@ -46,20 +1091,450 @@ class MathCalculator:
         if error:
             return error
         try:
-            derivative_expr = diff(expr, var)
-            return str(derivative_expr)
+            chain = MathCalculator._derivative_chain(expr, var, simplify_steps)
+            return str(chain.get(int(order)))
         except Exception as e:
             return f"Ошибка: невозможно вычислить производную ({str(e)})"
 
     @staticmethod
-    def calculate(expression: str, substitutions: dict = None):
+    def derivative_values(expression: str, variable: str, points, order: int = 1, substitutions: dict = None):
+        """
+        Численно вычисляет значение выражения и его производные до порядка order
+        в точках points автоматическим дифференцированием (арифметика усечённых
+        рядов Тейлора), без построения символьных производных.
+        substitutions задаёт значения остальных переменных.
+        Возвращает кортеж (ndarray формы (order + 1, *points.shape), None) или (None, ошибка);
+        точки вне области определения дают nan, невещественные константы — ошибку.
+        """
+        if np is None:
+            return None, "Ошибка: для численного дифференцирования требуется NumPy"
+        var, error = MathCalculator._safe_sympify(variable)
+        if error:
+            return None, error
+        expr, error = MathCalculator._safe_sympify(expression)
+        if error:
+            return None, error
+        constants = {Symbol(str(name)): value for name, value in (substitutions or {}).items()}
+        missing = expr.free_symbols - {var} - set(constants)
+        if missing:
+            return None, f"Ошибка: не заданы значения переменных {', '.join(sorted(map(str, missing)))}"
+        try:
+            jet = _taylor_evaluate(expr, var, np.asarray(points, dtype=np.float64), int(order), constants)
+            with np.errstate(all="ignore"):
+                return jet.derivatives(), None
+        except Exception as e:
+            return None, f"Ошибка: невозможно вычислить производные ({str(e)})"
+
+    @staticmethod
+    def _parse_many(values):
+        """Разбирает последовательность строк (или строку через запятую); возвращает (список, ошибка)."""
+        if isinstance(values, str):
+            values = [value.strip() for value in values.split(",")]
+        parsed = []
+        for value in values:
+            item, error = MathCalculator._safe_sympify(value)
+            if error:
+                return None, error
+            parsed.append(item)
+        return parsed, None
+
+    @staticmethod
+    def _differentiation_setup(expressions, variables):
+        """Общий разбор аргументов gradient/jacobian/hessian; возвращает (выражения, переменные, ошибка)."""
+        exprs, error = MathCalculator._parse_many(expressions)
+        if error:
+            return None, None, error
+        if variables is None:
+            symbols = sorted(set().union(*(expr.free_symbols for expr in exprs)), key=str)
+        else:
+            symbols, error = MathCalculator._parse_many(variables)
+            if error:
+                return None, None, error
+        return exprs, symbols, None
+
+    @staticmethod
+    def _matrix_result(matrix, use_cse: bool):
+        """При use_cse=True выносит общие подвыражения всех элементов матрицы сразу."""
+        if not use_cse:
+            return matrix
+        replacements, (reduced,) = sympy.cse(matrix)
+        return replacements, reduced
+
+    @staticmethod
+    def _gradient(expr, symbols):
+        # Общие подвыражения выносятся до дифференцирования, и градиент считается
+        # по цепному правилу через временные переменные: производная выражения по
+        # временной переменной находится один раз для всех переменных сразу
+        replacements, (reduced,) = sympy.cse([expr], symbols=sympy.numbered_symbols("t", cls=sympy.Dummy))
+        grads = {}
+
+        def chain(node):
+            result = [diff(node, sym) for sym in symbols]
+            for temporary in node.free_symbols & grads.keys():
+                partial = diff(node, temporary)
+                result = [r + partial * g for r, g in zip(result, grads[temporary])]
+            return result
+
+        for temporary, value in replacements:
+            grads[temporary] = chain(value)
+        back = list(reversed(replacements))
+        return [g.subs(back) for g in chain(reduced)]
+
+    @staticmethod
+    def gradient(expression: str, variables=None, cse: bool = False):
+        """
+        Вычисляет градиент выражения по списку переменных (по умолчанию — все свободные).
+        Возвращает кортеж (столбец sympy.Matrix, None) или (None, ошибка).
+        Общие подвыражения выражения дифференцируются один раз для всех переменных.
+        При cse=True вместо матрицы возвращается пара (замены, матрица) из sympy.cse
+        по всем элементам результата сразу.
+        """
+        exprs, symbols, error = MathCalculator._differentiation_setup([expression], variables)
+        if error:
+            return None, error
+        try:
+            matrix = sympy.Matrix(MathCalculator._gradient(exprs[0], symbols))
+            return MathCalculator._matrix_result(matrix, cse), None
+        except Exception as e:
+            return None, f"Ошибка: невозможно вычислить градиент ({str(e)})"
+
+    @staticmethod
+    def jacobian(expressions, variables=None, cse: bool = False):
+        """
+        Вычисляет матрицу Якоби списка выражений по списку переменных.
+        Возвращает кортеж (sympy.Matrix, None) или (None, ошибка); cse — как в gradient.
+        """
+        exprs, symbols, error = MathCalculator._differentiation_setup(expressions, variables)
+        if error:
+            return None, error
+        try:
+            matrix = sympy.Matrix([MathCalculator._gradient(expr, symbols) for expr in exprs])
+            return MathCalculator._matrix_result(matrix, cse), None
+        except Exception as e:
+            return None, f"Ошибка: невозможно вычислить матрицу Якоби ({str(e)})"
+
+    @staticmethod
+    def hessian(expression: str, variables=None, cse: bool = False):
+        """
+        Вычисляет матрицу Гессе выражения. Вычисляется только верхний треугольник
+        (из уже найденного градиента), нижний заполняется по симметрии.
+        Возвращает кортеж (sympy.Matrix, None) или (None, ошибка); cse — как в gradient.
+        """
+        exprs, symbols, error = MathCalculator._differentiation_setup([expression], variables)
+        if error:
+            return None, error
+        try:
+            grad = MathCalculator._gradient(exprs[0], symbols)
+            size = len(symbols)
+            matrix = sympy.zeros(size, size)
+            for i in range(size):
+                for j in range(i, size):
+                    matrix[i, j] = matrix[j, i] = diff(grad[i], symbols[j])
+            return MathCalculator._matrix_result(matrix, cse), None
+        except Exception as e:
+            return None, f"Ошибка: невозможно вычислить матрицу Гессе ({str(e)})"
+
+    @staticmethod
+    def _run_limited(operation: str, func, args, timeout: float = None):
+        """
+        Выполняет func(*args) с ограничением времени (None — default_timeout).
+        При превышении процесс вычисления завершается и возбуждается CalculationTimeout.
+        """
+        if timeout is None:
+            timeout = MathCalculator.default_timeout
+        if timeout is None:
+            return func(*args)
+        call = KillableCall(func, *args)
+        if not call.wait(timeout):
+            call.cancel()
+            raise CalculationTimeout(operation, timeout)
+        return call.result()
+
+    @staticmethod
+    def _integral_text(expr, spec, use_cse: bool = False) -> str:
+        return MathCalculator._format_result(integrate(expr, spec), use_cse)
+
+    @staticmethod
+    def _integration_strategy(name: str, expr, var):
+        """
+        Ищет первообразную одной стратегией SymPy.
+        Возвращает пару (строка результата, проверена ли первообразная) или None.
+        """
+        if name == "risch":
+            from sympy.integrals.risch import risch_integrate
+            antiderivative = risch_integrate(expr, var)
+        elif name == "meijerg":
+            antiderivative = integrate(expr, var, meijerg=True)
+        elif name == "manual":
+            from sympy.integrals.manualintegrate import manualintegrate
+            antiderivative = manualintegrate(expr, var)
+        elif name == "heurisch":
+            from sympy.integrals.heurisch import heurisch
+            antiderivative = heurisch(expr, var)
+        else:
+            antiderivative = integrate(expr, var)
+        if antiderivative is None:
+            return None
+        if antiderivative.has(sympy.Integral):
+            return str(antiderivative), False
+        # Сначала дешёвая проверка раскрытием скобок, затем полная
+        residual = diff(antiderivative, var) - expr
+        verified = sympy.expand(residual) == 0 or residual.equals(0) is True
+        return str(antiderivative), verified
+
+    @staticmethod
+    def _integrate_race(expr, var, timeout: float = None, use_cse: bool = False) -> str:
+        """
+        Запускает стратегии интегрирования параллельно в отдельных процессах и
+        возвращает первую первообразную, прошедшую проверку дифференцированием;
+        остальные процессы завершаются. Если стратегия "default" дала непроверенный
+        результат, остальные ждут не дольше race_grace секунд, после чего
+        возвращается результат "default".
+        """
+        if timeout is None:
+            timeout = MathCalculator.default_timeout
+        started = time.perf_counter()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        calls = {
+            name: KillableCall(MathCalculator._integration_strategy, name, expr, var)
+            for name in MathCalculator.integration_strategies
+        }
+        pending = dict(calls)
+        fallback = fallback_at = None
+        try:
+            while pending:
+                wait = None if deadline is None else deadline - time.monotonic()
+                if fallback is not None:
+                    grace = fallback_at + MathCalculator.race_grace - time.monotonic()
+                    wait = grace if wait is None else min(wait, grace)
+                if wait is not None and wait <= 0:
+                    break
+                completed = next(_as_completed(pending, wait), None)
+                if completed is None:
+                    break
+                name, call = completed
+                del pending[name]
+                try:
+                    outcome = call.result()
+                except Exception:
+                    continue
+                if outcome is None:
+                    continue
+                text, verified = outcome
+                if verified:
+                    elapsed = time.perf_counter() - started
+                    MathCalculator.timing_stats.record(f"integrate_race:{name}", elapsed)
+                    logger.info("integrate race: strategy %s won in %.3f s", name, elapsed)
+                    if use_cse:
+                        result = MathCalculator._format_result(sympify(text), True)
+                        return AnnotatedResult(result, strategy=name, **result.info)
+                    return AnnotatedResult(text, strategy=name)
+                if name == "default":
+                    fallback = text
+                    fallback_at = time.monotonic()
+        finally:
+            for call in calls.values():
+                call.cancel()
+        if fallback is not None:
+            return AnnotatedResult(fallback, strategy="default")
+        if not pending:
+            raise ValueError("ни одна стратегия не нашла первообразную")
+        raise CalculationTimeout("integrate", timeout)
+
+    @staticmethod
+    def _quadrature(expr, var, a, b):
+        """Численно интегрирует выражение адаптивной квадратурой mpmath; возвращает (значение, погрешность)."""
+        import mpmath
+
+        f = lambdify(var, expr, modules="mpmath")
+        lower, upper = (lambdify([], limit, modules="mpmath")() for limit in (a, b))
+        value, error = mpmath.quad(f, [lower, upper], error=True)
+        value = complex(value)
+        return (value.real if value.imag == 0 else value), float(error)
+
+    @staticmethod
+    def _integrate_racing(expr, var, a, b, budget: float, use_cse: bool = False, timeout: float = None):
+        """
+        Запускает символьное и численное интегрирование параллельно в отдельных
+        процессах. Замкнутая форма возвращается, как только найдена; если к
+        моменту budget секунд её нет, а численное значение готово, возвращается
+        оно с оценкой погрешности. Если численный путь невозможен (параметры в
+        подынтегральном выражении и т.п.), символьный ждёт в пределах timeout
+        (None — MathCalculator.default_timeout), как без численного запасного пути.
+        """
+        limit = timeout if timeout is not None else MathCalculator.default_timeout
+        started = time.monotonic()
+        deadline = None if limit is None else started + limit
+        calls = {
+            "symbolic": KillableCall(MathCalculator._integral_text, expr, (var, a, b), use_cse),
+            "numeric": KillableCall(MathCalculator._quadrature, expr, var, a, b),
+        }
+        pending = dict(calls)
+        numeric = unevaluated = failure = None
+        try:
+            while pending:
+                wait = None if deadline is None else deadline - time.monotonic()
+                if numeric is not None:
+                    left = started + budget - time.monotonic()
+                    wait = left if wait is None else min(wait, left)
+                if wait is not None and wait <= 0:
+                    break
+                completed = next(_as_completed(pending, wait), None)
+                if completed is None:
+                    break
+                name, call = completed
+                del pending[name]
+                try:
+                    value = call.result()
+                except Exception as e:
+                    if name == "symbolic":
+                        failure = e
+                    continue
+                if name == "numeric":
+                    numeric = value
+                elif "Integral(" not in value:
+                    return value
+                else:
+                    unevaluated = value
+        finally:
+            for call in calls.values():
+                call.cancel()
+        if numeric is not None:
+            value, error = numeric
+            return AnnotatedResult(str(value), method="numeric", value=value, error=error)
+        if unevaluated is not None:
+            return unevaluated
+        if failure is not None:
+            raise failure
+        raise CalculationTimeout("integrate", limit)
+
+    @staticmethod
+    def _simplified_text(expr) -> str:
+        return str(simplify(expr))
+
+    @staticmethod
+    def _simplify_strategy(name: str, expr):
+        """Применяет одну целевую процедуру упрощения SymPy по имени."""
+        return getattr(sympy, name)(expr)
+
+    @staticmethod
+    def _simplify_race(expr, budget: float):
+        """
+        Запускает процедуры MathCalculator.simplify_strategies параллельно и ждёт
+        их не дольше budget секунд. Возвращает результат с наименьшим count_ops
+        (исходное выражение, если ни одна процедура его не улучшила);
+        info["complete"] — успели ли завершиться все процедуры.
+        """
+        started = time.perf_counter()
+        calls = {
+            name: KillableCall(MathCalculator._simplify_strategy, name, expr)
+            for name in MathCalculator.simplify_strategies
+        }
+        best, best_ops, winner = expr, sympy.count_ops(expr), "original"
+        finished = 0
+        try:
+            for name, call in _as_completed(calls, budget):
+                finished += 1
+                try:
+                    candidate = call.result()
+                except Exception:
+                    continue
+                ops = sympy.count_ops(candidate)
+                if ops < best_ops:
+                    best, best_ops, winner = candidate, ops, name
+        finally:
+            for call in calls.values():
+                call.cancel()
+        elapsed = time.perf_counter() - started
+        MathCalculator.timing_stats.record(f"simplify_race:{winner}", elapsed)
+        logger.info("fast simplify: strategy %s won (count_ops=%d) in %.3f s", winner, best_ops, elapsed)
+        return AnnotatedResult(str(best), strategy=winner, count_ops=best_ops, complete=finished == len(calls))
+
+    @staticmethod
+    def _compile(expr, symbols, backend: str = None) -> CompiledExpression:
+        """Возвращает скомпилированную функцию из кэша или компилирует выражение."""
+        backend = backend or ("numpy" if np is not None else "math")
+        key = (sympy.srepr(expr), tuple(sympy.srepr(sym) for sym in symbols), backend)
+        compiled = MathCalculator.compiled_cache.get(key)
+        if compiled is None:
+            compiled = CompiledExpression(expr, symbols, backend)
+            MathCalculator.timing_stats.record("compile", compiled.compile_time)
+            MathCalculator.compiled_cache.put(key, compiled)
+        return compiled
+
+    @staticmethod
+    def compile_expression(expression: str, variables=None, backend: str = None):
+        """
+        Компилирует выражение в числовую функцию (бэкенд "numpy" или "math").
+        variables задаёт порядок аргументов; по умолчанию — свободные переменные по алфавиту.
+        Возвращает кортеж (CompiledExpression, None) или (None, ошибка).
+        """
+        expr, error = MathCalculator._safe_sympify(expression)
+        if error:
+            return None, error
+        if variables is None:
+            symbols = sorted(expr.free_symbols, key=str)
+        else:
+            symbols = []
+            for name in variables:
+                sym, error = MathCalculator._safe_sympify(name)
+                if error:
+                    return None, error
+                symbols.append(sym)
+        try:
+            return MathCalculator._compile(expr, symbols, backend), None
+        except Exception as e:
+            return None, f"Ошибка компиляции выражения: {str(e)}"
+
+    @staticmethod
+    def _calculate_compiled(expr, substitutions: dict):
+        """
+        Вычисляет выражение через скомпилированную функцию.
+        Возвращает число или None, если выражение нельзя вычислить этим путём.
+        """
+        names = sorted(substitutions, key=str)
+        symbols = [Symbol(str(name)) for name in names]
+        if not expr.free_symbols <= set(symbols):
+            return None
+        try:
+            values = [float(substitutions[name]) for name in names]
+            compiled = MathCalculator._compile(expr, symbols)
+            started = time.perf_counter()
+            value = compiled(*values)
+            MathCalculator.timing_stats.record("compiled", time.perf_counter() - started)
+            value = complex(value)
+        except Exception:
+            return None
+        # Комплексные, бесконечные и неопределённые значения отдаются evalf
+        if value.imag != 0 or not cmath.isfinite(value):
+            return None
+        return value.real
+
+    @staticmethod
+    def calculate(expression: str, substitutions: dict = None, compiled: bool = False):
         """
         Вычисляет числовое значение выражения с возможной подстановкой переменных.
         Возвращает кортеж (строка выражения, численный результат) или (ошибка, None).
+
+        При compiled=True выражение один раз компилируется через lambdify и
+        вычисляется скомпилированной функцией; в этом режиме возвращается
+        исходное выражение и значение типа float. Если выражение не удаётся
+        вычислить таким образом, используется обычный путь через evalf.
+        Время вычислений накапливается в MathCalculator.timing_stats.
         """
         expr, error = MathCalculator._safe_sympify(expression)
         if error:
             return error, None
+        return MathCalculator._evaluate(expr, substitutions, compiled)
+
+    @staticmethod
+    def _evaluate(expr, substitutions: dict, compiled: bool):
+        """Вычисляет уже разобранное выражение; возвращает пару в формате calculate()."""
+        if compiled:
+            value = MathCalculator._calculate_compiled(expr, substitutions or {})
+            if value is not None:
+                return str(expr), value
+        started = time.perf_counter()
         if substitutions:
             try:
                 expr = expr.subs(substitutions)
@@ -67,15 +1542,202 @@ class MathCalculator:
                 return f"Ошибка в подстановке переменных: {str(e)}", None
         try:
             result = expr.evalf()
+            MathCalculator.timing_stats.record("evalf", time.perf_counter() - started)
             return str(expr), result
         except Exception as e:
             return f"Ошибка при вычислении: {str(e)}", None
 
     @staticmethod
-    def integrate(expression: str, variable: str, lower: str = None, upper: str = None) -> str:
+    def calculate_many(expression: str, arrays: dict, complex_results: bool = False):
+        """
+        Вычисляет выражение над массивами NumPy одним векторизованным вызовом.
+        arrays — словарь {переменная: массив}; массивы согласуются по правилам broadcasting.
+        Возвращает кортеж (строка выражения, ndarray) или (ошибка, None).
+
+        По умолчанию результат вещественный: точки вне области определения,
+        бесконечности и комплексные значения заменяются на nan (маска — np.isnan).
+        При complex_results=True вычисления ведутся в комплексных числах.
+        """
+        if np is None:
+            return "Ошибка: для вычислений над массивами требуется NumPy", None
+        expr, error = MathCalculator._safe_sympify(expression)
+        if error:
+            return error, None
+        names = sorted(arrays, key=str)
+        symbols = [Symbol(str(name)) for name in names]
+        missing = expr.free_symbols - set(symbols)
+        if missing:
+            return f"Ошибка: не заданы значения переменных {', '.join(sorted(map(str, missing)))}", None
+        dtype = np.complex128 if complex_results else np.float64
+        try:
+            values = [np.asarray(arrays[name], dtype=dtype) for name in names]
+            shape = np.broadcast_shapes(*(value.shape for value in values))
+            compiled = MathCalculator._compile(expr, symbols, "numpy")
+            started = time.perf_counter()
+            result = np.asarray(compiled(*values))
+            MathCalculator.timing_stats.record("vectorized", time.perf_counter() - started)
+        except Exception as e:
+            return f"Ошибка при вычислении: {str(e)}", None
+        # Константные выражения дают скаляр — приводим к общей форме аргументов
+        result = np.array(np.broadcast_to(result, shape))
+        if complex_results:
+            return str(expr), result.astype(np.complex128)
+        if np.iscomplexobj(result):
+            result = np.where(result.imag == 0, result.real, np.nan)
+        result = result.astype(np.float64)
+        result[~np.isfinite(result)] = np.nan
+        return str(expr), result
+
+    @staticmethod
+    def adaptive_samples(expression: str, variable: str, a: float, b: float, initial: int = 257,
+                         max_points: int = 100000, chunk_size: int = 8192, tolerance: float = 1e-3):
+        """
+        Адаптивная выборка значений выражения на отрезке [a, b] для построения графика.
+        Возвращает кортеж (генератор, None) или (None, ошибка). Генератор сначала
+        выдаёт равномерную грубую выборку (xs, ys), затем всё более подробные:
+        интервалы делятся пополам там, где кривизна велика (отклонение точки от
+        хорды соседей больше tolerance от размаха значений), у скачков и на
+        границах области определения (nan). Новые точки вычисляются векторно
+        порциями по chunk_size; общее число точек не превышает max_points.
+        """
+        if np is None:
+            return None, "Ошибка: для построения графиков требуется NumPy"
+        var, error = MathCalculator._safe_sympify(variable)
+        if error:
+            return None, error
+        expr, error = MathCalculator._safe_sympify(expression)
+        if error:
+            return None, error
+        if expr.free_symbols - {var}:
+            return None, "Ошибка: выражение должно зависеть только от переменной графика"
+        try:
+            compiled = MathCalculator._compile(expr, [var], "numpy")
+        except Exception as e:
+            return None, f"Ошибка компиляции выражения: {str(e)}"
+
+        def evaluate(xs):
+            parts = []
+            for start in range(0, len(xs), chunk_size):
+                chunk = xs[start:start + chunk_size]
+                values = np.broadcast_to(np.asarray(compiled(chunk)), chunk.shape)
+                if np.iscomplexobj(values):
+                    values = np.where(values.imag == 0, values.real, np.nan)
+                parts.append(values.astype(np.float64))
+            return np.concatenate(parts) if parts else np.empty(0)
+
+        def refine():
+            xs = np.linspace(float(a), float(b), initial)
+            ys = evaluate(xs)
+            yield xs, ys
+            min_width = abs(float(b) - float(a)) * 1e-12
+            while len(xs) < max_points:
+                finite = np.isfinite(ys)
+                if finite.any():
+                    low, high = np.percentile(ys[finite], [2, 98])
+                    span = max(high - low, 1e-12)
+                else:
+                    span = 1.0
+                with np.errstate(all="ignore"):
+                    # Отклонение внутренних точек от хорды между соседями
+                    t = (xs[1:-1] - xs[:-2]) / (xs[2:] - xs[:-2])
+                    deviation = np.abs(ys[1:-1] - (ys[:-2] + (ys[2:] - ys[:-2]) * t)) / span
+                    score = np.zeros(len(xs) - 1)
+                    score[:-1] = np.fmax(score[:-1], np.nan_to_num(deviation, nan=0.0))
+                    score[1:] = np.fmax(score[1:], np.nan_to_num(deviation, nan=0.0))
+                    # Скачки и границы области определения уточняются в первую очередь
+                    jump = np.abs(np.diff(ys)) / span > 0.1
+                    edge = finite[:-1] != finite[1:]
+                score[jump | edge] = np.inf
+                score[np.diff(xs) <= min_width] = 0
+                candidates = np.flatnonzero(score > tolerance)
+                if not len(candidates):
+                    return
+                budget = max_points - len(xs)
+                if len(candidates) > budget:
+                    candidates = candidates[np.argpartition(score[candidates], -budget)[-budget:]]
+                new_xs = (xs[candidates] + xs[candidates + 1]) / 2
+                with np.errstate(all="ignore"):
+                    new_ys = evaluate(new_xs)
+                xs = np.concatenate([xs, new_xs])
+                ys = np.concatenate([ys, new_ys])
+                order = np.argsort(xs, kind="stable")
+                xs, ys = xs[order], ys[order]
+                yield xs, ys
+
+        return refine(), None
+
+    @staticmethod
+    def calculate_batch(expression: str, rows, chunk_size: int = None):
+        """
+        Вычисляет выражение для списка словарей подстановок.
+        Выражение разбирается и компилируется один раз; строки с одинаковым
+        набором переменных вычисляются вместе (порциями по chunk_size, если задан).
+        Возвращает список результатов в формате calculate() в исходном порядке;
+        ошибка в одной строке не прерывает обработку остальных.
+        """
+        expr, error = MathCalculator._safe_sympify(expression)
+        if error:
+            return [(error, None)] * len(rows)
+        text = str(expr)
+        results = [None] * len(rows)
+        groups = {}
+        for index, substitutions in enumerate(rows):
+            names = tuple(sorted((substitutions or {}), key=str))
+            groups.setdefault(names, []).append(index)
+
+        for names, indices in groups.items():
+            symbols = [Symbol(str(name)) for name in names]
+            vectorize = np is not None and expr.free_symbols <= set(symbols)
+            step = chunk_size or len(indices)
+            for start in range(0, len(indices), step):
+                chunk = indices[start:start + step]
+                values = MathCalculator._evaluate_chunk(expr, symbols, names, [rows[i] for i in chunk]) \
+                    if vectorize else None
+                for position, index in enumerate(chunk):
+                    value = values[position] if values is not None else None
+                    if value is not None and math.isfinite(value):
+                        results[index] = (text, float(value))
+                    else:
+                        # Значения вне области определения и ошибки разбираются построчно
+                        results[index] = MathCalculator._evaluate(expr, rows[index], compiled=True)
+        return results
+
+    @staticmethod
+    def _evaluate_chunk(expr, symbols, names, chunk):
+        """Векторно вычисляет порцию строк; возвращает массив значений или None."""
+        try:
+            columns = [np.array([row[name] for row in chunk], dtype=np.float64) for name in names]
+            compiled = MathCalculator._compile(expr, symbols, "numpy")
+            started = time.perf_counter()
+            values = np.broadcast_to(np.asarray(compiled(*columns)), (len(chunk),))
+            MathCalculator.timing_stats.record("batch", time.perf_counter() - started)
+        except Exception:
+            return None
+        if np.iscomplexobj(values):
+            values = np.where(values.imag == 0, values.real, np.nan)
+        return values.astype(np.float64)
+
+    @staticmethod
+    def integrate(expression: str, variable: str, lower: str = None, upper: str = None,
+                  timeout: float = None, numeric_fallback: bool = False, race_strategies: bool = False,
+                  cse: bool = False) -> str:
         """
         Вычисляет первообразную выражения (неопределенный или определенный интеграл).
         Возвращает строку результата или сообщение об ошибке.
+        timeout — ограничение времени в секундах (None — MathCalculator.default_timeout).
+
+        При numeric_fallback=True определённый интеграл параллельно считается
+        численно; если за timeout (или MathCalculator.symbolic_budget) секунд
+        замкнутая форма не найдена, возвращается AnnotatedResult с численным
+        значением и оценкой погрешности в info["error"]. Если численно
+        интеграл не вычисляется, действует обычное ограничение timeout.
+
+        При race_strategies=True неопределённый интеграл ищется одновременно
+        несколькими стратегиями (MathCalculator.integration_strategies) в пуле
+        процессов; победившая стратегия указывается в info["strategy"].
+
+        При cse=True символьный результат возвращается в форме с общими
+        подвыражениями (см. _format_result).
         """
         var, error = MathCalculator._safe_sympify(variable)
         if error:
@@ -83,6 +1745,7 @@ class MathCalculator:
         expr, error = MathCalculator._safe_sympify(expression)
         if error:
             return error
+        limit = timeout if timeout is not None else MathCalculator.default_timeout
 
         if (lower is not None and upper is None) or (lower is None and upper is not None):
             return "Ошибка: должны быть заданы оба предела интегрирования или ни один."
@@ -92,49 +1755,408 @@ class MathCalculator:
             b, err_b = MathCalculator._safe_sympify(upper)
             if err_a or err_b:
                 return "Ошибка: некорректные пределы интегрирования"
+            if numeric_fallback:
+                budget = timeout or MathCalculator.default_timeout or MathCalculator.symbolic_budget
+                compute = lambda: MathCalculator._integrate_racing(expr, var, a, b, budget, cse, timeout)
+                mode = f"numeric_fallback:{budget}"
+            else:
+                compute = lambda: MathCalculator._run_limited(
+                    "integrate", MathCalculator._integral_text, (expr, (var, a, b), cse), timeout
+                )
+                mode = f"timeout:{limit}"
             try:
-                integral = integrate(expr, (var, a, b))
-                return str(integral)
+                return MathCalculator._memoized(
+                    "integrate:cse" if cse else "integrate", (expr, var, a, b), compute,
+                    cacheable=lambda result: getattr(result, "info", {}).get("method") != "numeric",
+                    mode=mode,
+                )
+            except CalculationTimeout as e:
+                return e.result()
             except Exception as e:
                 return f"Ошибка при вычислении определенного интеграла: {str(e)}"
         else:
+            if race_strategies:
+                compute = lambda: MathCalculator._integrate_race(expr, var, timeout, cse)
+            else:
+                compute = lambda: MathCalculator._run_limited(
+                    "integrate", MathCalculator._integral_text, (expr, var, cse), timeout
+                )
+            mode = f"race:{race_strategies}:timeout:{limit}"
             try:
-                integral = integrate(expr, var)
-                return str(integral)
+                return MathCalculator._memoized(
+                    "integrate:cse" if cse else "integrate", (expr, var), compute, mode=mode
+                )
+            except CalculationTimeout as e:
+                return e.result()
             except Exception as e:
                 return f"Ошибка при вычислении неопределенного интеграла: {str(e)}"
 
     @staticmethod
-    def simplify_expression(expression: str) -> str:
-        """Упрощает математическое выражение."""
+    def simplify_expression(expression: str, timeout: float = None, fast: bool = False) -> str:
+        """
+        Упрощает математическое выражение.
+        timeout — ограничение времени в секундах (None — MathCalculator.default_timeout).
+
+        При fast=True вместо simplify() параллельно запускаются дешёвые целевые
+        процедуры (trigsimp, radsimp, cancel, powsimp, factor) с бюджетом timeout
+        (или MathCalculator.fast_simplify_budget) секунд; возвращается результат
+        с наименьшим count_ops, победившая процедура — в info["strategy"].
+        """
         expr, error = MathCalculator._safe_sympify(expression)
         if error:
             return error
+        if fast:
+            budget = timeout or MathCalculator.default_timeout or MathCalculator.fast_simplify_budget
+            try:
+                # Исходное выражение, возвращённое из-за нехватки времени, зависит
+                # от нагрузки и не кэшируется
+                return MathCalculator._memoized(
+                    "simplify_fast", (expr,), lambda: MathCalculator._simplify_race(expr, budget),
+                    cacheable=lambda result: result.info["strategy"] != "original" or result.info["complete"],
+                    mode=f"budget:{budget}",
+                )
+            except Exception as e:
+                return f"Ошибка при упрощении: {str(e)}"
         try:
-            simplified = simplify(expr)
-            return str(simplified)
+            return MathCalculator._memoized(
+                "simplify", (expr,),
+                lambda: MathCalculator._run_limited("simplify", MathCalculator._simplified_text, (expr,), timeout),
+                mode=f"timeout:{timeout if timeout is not None else MathCalculator.default_timeout}",
+            )
+        except CalculationTimeout as e:
+            return e.result()
         except Exception as e:
             return f"Ошибка при упрощении: {str(e)}"
 
     @staticmethod
-    def series_expansion(expression: str, variable: str, n: int = 5, x0=0) -> str:
+    def taylor_series(expression: str, variable: str, x0=0):
+        """
+        Возвращает кортеж (TaylorSeries, None) или (None, ошибка). Объект ряда
+        кэшируется для тройки (выражение, переменная, x0), поэтому уже вычисленные
+        коэффициенты переиспользуются, а новые порядки достраиваются лениво.
+        """
+        var, error = MathCalculator._safe_sympify(variable)
+        if error:
+            return None, error
+        expr, error = MathCalculator._safe_sympify(expression)
+        if error:
+            return None, error
+        point, error = MathCalculator._safe_sympify(x0)
+        if error:
+            return None, error
+        return MathCalculator._taylor_series(expr, var, point), None
+
+    @staticmethod
+    def _taylor_series(expr, var, x0) -> TaylorSeries:
+        key = (sympy.srepr(expr), sympy.srepr(var), sympy.srepr(x0))
+        taylor = MathCalculator.taylor_cache.get(key)
+        if taylor is None:
+            taylor = TaylorSeries(expr, var, x0)
+            MathCalculator.taylor_cache.put(key, taylor)
+        return taylor
+
+    @staticmethod
+    def numeric_taylor(expression: str, variable: str, n: int = 5, x0=0, radius: float = None) -> str:
+        """
+        Численно вычисляет n коэффициентов Тейлора в числовой точке x0 по
+        значениям скомпилированной функции на окружности вокруг x0 и БПФ.
+        Радиус подбирается автоматически, если не задан.
+        Возвращает AnnotatedResult с многочленом Тейлора; в info — массив
+        "coefficients", оценки погрешности "error" и выбранный "radius".
+        Части коэффициентов в пределах оценки погрешности обнуляются; для
+        вещественной точки x0 с пренебрежимыми мнимыми частями ряд вещественный.
+        """
+        if np is None:
+            return "Ошибка: для численного разложения требуется NumPy"
+        var, error = MathCalculator._safe_sympify(variable)
+        if error:
+            return error
+        expr, error = MathCalculator._safe_sympify(expression)
+        if error:
+            return error
+        if expr.free_symbols - {var}:
+            return "Ошибка: для численного разложения выражение должно зависеть только от переменной разложения"
+        try:
+            point = complex(sympify(x0))
+            compiled = MathCalculator._compile(expr, [var], "numpy")
+            coefficients, errors, r = _fft_taylor(compiled, point, int(n), radius)
+        except Exception as e:
+            return f"Ошибка при численном разложении в ряд: {str(e)}"
+        # Вещественные и мнимые части, не превышающие оценки погрешности, неотличимы от нуля
+        coefficients = np.where(np.abs(coefficients.real) <= errors, 0, coefficients.real) + \
+            1j * np.where(np.abs(coefficients.imag) <= errors, 0, coefficients.imag)
+        # Мнимые части порядка шума округления БПФ (оценка погрешности занижает
+        # его в несколько раз) у функции, вещественной в вещественной точке, отбрасываются
+        tolerance = np.maximum(10 * errors, 1e-12 * np.abs(coefficients))
+        if point.imag == 0 and np.all(np.abs(coefficients.imag) <= tolerance):
+            coefficients = coefficients.real
+            point = point.real
+        shift = var - point if point != 0 else var
+        polynomial = sympy.Add(*[sympify(c) * shift ** k for k, c in enumerate(coefficients.tolist())])
+        return AnnotatedResult(str(polynomial), backend="numeric", coefficients=coefficients,
+                               error=errors, radius=r)
+
+    @staticmethod
+    def _series_text(expr, var, n: int, x0, backend: str) -> str:
+        """Выполняет разложение выбранным бэкендом; "auto" пробует кольцевые ряды, затем series()."""
+        if backend in ("auto", "ring"):
+            try:
+                return AnnotatedResult(str(_ring_series(expr, var, n, sympify(x0))), backend="ring")
+            except NotImplementedError:
+                if backend == "ring":
+                    raise
+        return AnnotatedResult(str(series(expr, var, x0, n).removeO()), backend="generic")
+
+    @staticmethod
+    def series_expansion(expression: str, variable: str, n: int = 5, x0=0, incremental: bool = False,
+                         backend: str = "auto") -> str:
         """
         Выполняет разложение выражения в ряд Тейлора около точки x0 (по умолчанию 0) до порядка n.
+        При incremental=True используется кэшируемый TaylorSeries: повышение порядка
+        достраивает только недостающие коэффициенты. Для выражений, не аналитичных
+        в x0 (ряд Лорана, ветвление), используется обычный series().
+
+        backend: "auto" — выражения из +, *, /, степеней, exp, log, sin, cos и т.п.
+        раскладываются быстрой арифметикой разреженных многочленов (ring_series),
+        остальные — обычным series(); "ring" или "generic" задают бэкенд явно.
+        "numeric" вычисляет коэффициенты численно (см. numeric_taylor); массив
+        коэффициентов, оценки их погрешности и радиус — в info.
+        Использованный бэкенд указывается в info["backend"].
         """
+        if backend == "numeric":
+            return MathCalculator.numeric_taylor(expression, variable, n, x0)
         var, error = MathCalculator._safe_sympify(variable)
         if error:
             return error
         expr, error = MathCalculator._safe_sympify(expression)
         if error:
             return error
+        if incremental:
+            try:
+                taylor = MathCalculator._taylor_series(expr, var, sympify(x0))
+                return AnnotatedResult(str(taylor.polynomial(n)), backend="taylor")
+            except Exception:
+                # Неаналитичное выражение или сбой sympy.limit — разложение через series()
+                pass
         try:
-            ser = series(expr, var, x0, n).removeO()
-            return str(ser)
+            return MathCalculator._memoized(
+                f"series:{backend}", (expr, var, int(n), sympify(x0)),
+                lambda: MathCalculator._series_text(expr, var, n, x0, backend),
+            )
+        except NotImplementedError as e:
+            return f"Ошибка: выражение не поддерживается бэкендом {backend} ({str(e)})"
         except Exception as e:
             return f"Ошибка при разложении в ряд: {str(e)}"
 
 
+# Операции пакетной обработки и HTTP-сервиса: метод MathCalculator,
+# обязательные и необязательные поля записи
+OPERATIONS = {
+    "derivative": ("derivative", ["expression", "variable"], ["cse"]),
+    "integrate": ("integrate", ["expression", "variable"],
+                  ["lower", "upper", "numeric_fallback", "race_strategies", "cse"]),
+    "calculate": ("calculate", ["expression"], ["substitutions"]),
+    "simplify": ("simplify_expression", ["expression"], ["fast"]),
+    "series": ("series_expansion", ["expression", "variable"], ["n", "x0", "backend"]),
+}
+
+# Предел числа записей, одновременно находящихся в обработке, на один процесс
+BATCH_WINDOW_PER_WORKER = 4
+
+
+def json_default(value):
+    """Преобразование для json.dumps: массивы NumPy — в списки, прочие объекты — в строку."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def _batch_init(timeout):
+    MathCalculator.default_timeout = timeout
+
+
+def _batch_worker(item):
+    """
+    Обрабатывает одну строку JSONL в процессе пула: {"op": ..., "expression": ..., ...}.
+    Возвращает (порядковый номер, запись результата, время вычисления).
+    """
+    number, line_number, line = item
+    started = time.perf_counter()
+    output = {"line": line_number}
+    try:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            raise ValueError("строка не является корректным JSON")
+        if not isinstance(record, dict):
+            raise ValueError("строка должна содержать объект JSON")
+        if "id" in record:
+            output["id"] = record["id"]
+        op = record.get("op")
+        if op not in OPERATIONS:
+            raise ValueError(f"неизвестная операция: {op}")
+        method, required, optional = OPERATIONS[op]
+        missing = [name for name in required if name not in record]
+        if missing:
+            raise ValueError(f"не заданы поля {', '.join(missing)}")
+        args = [record[name] for name in required]
+        kwargs = {name: record[name] for name in optional if name in record}
+        result = getattr(MathCalculator, method)(*args, **kwargs)
+        if isinstance(result, tuple):
+            # calculate возвращает (строка выражения, значение) или (ошибка, None)
+            text, value = result
+            if value is None:
+                output["error"] = text
+            else:
+                output["result"], output["expression"] = str(value), text
+        elif str(result).startswith("Ошибка"):
+            output["error"] = str(result)
+        else:
+            output["result"] = str(result)
+        if isinstance(result, AnnotatedResult) and result.info:
+            output["info"] = result.info
+    except Exception as e:
+        output["error"] = f"Ошибка: {str(e)}"
+    return number, output, time.perf_counter() - started
+
+
+def run_batch(source, out, workers: int = None, ordered: bool = True, timeout: float = None,
+              stats_out=sys.stderr) -> dict:
+    """
+    Обрабатывает операции из итератора строк JSONL source в пуле из workers
+    процессов и пишет результаты в out по мере готовности. При ordered=True
+    порядок результатов совпадает с порядком строк. В обработке одновременно
+    находится не больше BATCH_WINDOW_PER_WORKER записей на процесс, поэтому
+    вход читается постепенно. Возвращает статистику (число записей, ошибок,
+    пропускная способность, задержки).
+    """
+    workers = workers or os.cpu_count() or 1
+    window = workers * BATCH_WINDOW_PER_WORKER
+    done = queue.Queue()
+    buffered = {}
+    latencies = []
+    counters = {"submitted": 0, "written": 0, "errors": 0}
+    broken = []
+
+    def start_pool():
+        # Процессы ProcessPoolExecutor не демонические, поэтому операции внутри
+        # них могут выполнять вычисления с ограничением времени
+        return ProcessPoolExecutor(workers, mp_context=_mp_context(), initializer=_batch_init,
+                                   initargs=(timeout,))
+
+    def write(output):
+        out.write(json.dumps(output, ensure_ascii=False, default=json_default) + "\n")
+        counters["written"] += 1
+        counters["errors"] += "error" in output
+
+    def drain():
+        (number, line_number, _), future = done.get()
+        try:
+            _, output, seconds = future.result()
+            latencies.append(seconds)
+        except Exception as e:
+            # Процесс обработки погиб (например, из-за нехватки памяти) — запись
+            # получает ошибку, а пул пересоздаётся перед следующей отправкой
+            if isinstance(e, BrokenProcessPool):
+                broken.append(True)
+                message = "Ошибка: процесс обработки завершился аварийно"
+            else:
+                message = f"Ошибка: запись не обработана ({str(e) or type(e).__name__})"
+            output = {"line": line_number, "error": message}
+        if not ordered:
+            write(output)
+        else:
+            buffered[number] = output
+            while counters["written"] in buffered:
+                write(buffered.pop(counters["written"]))
+        out.flush()
+
+    def restart_pool():
+        nonlocal pool
+        pool.shutdown(wait=False)
+        pool = start_pool()
+        broken.clear()
+
+    def submit(item):
+        # Процесс может погибнуть и между записями: тогда пул сломан уже к моменту
+        # отправки, и запись отправляется в новый пул
+        if broken:
+            restart_pool()
+        try:
+            future = pool.submit(_batch_worker, item)
+        except BrokenProcessPool:
+            restart_pool()
+            future = pool.submit(_batch_worker, item)
+        future.add_done_callback(lambda future: done.put((item, future)))
+
+    started = time.perf_counter()
+    pool = start_pool()
+    try:
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            submit((counters["submitted"], line_number, line))
+            counters["submitted"] += 1
+            while counters["submitted"] - counters["written"] >= window:
+                drain()
+        while counters["written"] < counters["submitted"]:
+            drain()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    count = len(latencies)
+    stats = {
+        "records": count,
+        "errors": counters["errors"],
+        "seconds": elapsed,
+        "throughput": count / elapsed if elapsed else 0.0,
+    }
+    if count:
+        stats.update({
+            "latency_mean": sum(latencies) / count,
+            "latency_p50": latencies[(count - 1) // 2],
+            "latency_p95": latencies[int(0.95 * (count - 1))],
+            "latency_max": latencies[-1],
+        })
+    if stats_out is not None:
+        print(f"Обработано записей: {count} (ошибок: {stats['errors']}) за {elapsed:.2f} с, "
+              f"{stats['throughput']:.1f} записей/с", file=stats_out)
+        if count:
+            print(f"Время вычисления записи, с: среднее {stats['latency_mean']:.4f}, "
+                  f"медиана {stats['latency_p50']:.4f}, 95% {stats['latency_p95']:.4f}, "
+                  f"максимум {stats['latency_max']:.4f}", file=stats_out)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная обработка операций MathCalculator")
+    commands = parser.add_subparsers(dest="command", required=True)
+    batch = commands.add_parser("batch", help="обработать файл JSONL с операциями")
+    batch.add_argument("input", nargs="?", default="-", help="файл JSONL ('-' — stdin)")
+    batch.add_argument("--output", "-o", default="-", help="файл результатов ('-' — stdout)")
+    batch.add_argument("--workers", "-j", type=int, default=None, help="число процессов")
+    batch.add_argument("--unordered", action="store_true", help="выводить результаты по мере готовности")
+    batch.add_argument("--timeout", type=float, default=None, help="предельное время интегрирования и упрощения, с")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run_batch(source, out, args.workers, not args.unordered, args.timeout)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    return 1 if stats["errors"] else 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+
     print("=== Проверка производной ===")
     test_cases = [("x**2 + 2*x + 1", "x"), ("sin(x)", "x"), ("invalid expr", "x"), ("x**2", "y")]
     for expression, variable in test_cases:
@@ -158,3 +2180,14 @@ if __name__ == "__main__":
     print("\n=== Проверка ряда Тейлора ===")
     print(MathCalculator.series_expansion("exp(x)", "x", 6))
     print(MathCalculator.series_expansion("log(1+x)", "x", 6, 1))
+
+    print("\n=== Сверка быстрого разложения с sympy.series ===")
+    series_cases = [("(exp(x)-1)/x", 6, 0), ("log(1+x)/x", 5, 0), ("sin(x)**2/x**2", 6, 0),
+                    ("exp(sin(x))", 8, 0), ("sin(x)*cos(x)/(2+x)", 7, 0), ("sqrt(1+x)", 5, 0),
+                    ("log(1+x)", 6, 1), ("1/x", 4, 1)]
+    x = Symbol("x")
+    for expression, order, point in series_cases:
+        result = MathCalculator.series_expansion(expression, "x", order, point)
+        expected = series(sympify(expression), x, point, order).removeO()
+        status = "совпадает" if simplify(sympify(str(result)) - expected) == 0 else "РАСХОЖДЕНИЕ"
+        print(f"{expression} (n={order}, x0={point}, {result.info['backend']}): {status}")
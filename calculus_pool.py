@@ -0,0 +1,231 @@
+"""
+calculus_pool.py
+
+Пул заранее запущенных процессов-вычислителей MathCalculator. Каждый процесс
+один раз импортирует SymPy и calculus_core и затем выполняет операции по
+запросу, поэтому вызов не платит за запуск интерпретатора и импорт:
+
+    pool = WorkerPool(size=4)
+    pool.call("integrate", ("x**2", "x"), timeout=10)
+
+Число процессов ограничивает число одновременных вычислений. Процесс, не
+уложившийся в отведённое время или отменённый через cancel_event, завершается
+и заменяется новым.
+"""
+
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import threading
+import time
+
+from calculus_core import MathCalculator, TimeoutResult
+
+# Интервал проверки cancel_event во время ожидания, с
+CANCEL_CHECK_INTERVAL = 0.05
+
+
+def _pool_context():
+    """
+    Контекст multiprocessing для пула. Предпочтителен forkserver с заранее
+    импортированным calculus_core: новые процессы порождаются быстро и без
+    fork многопоточного родителя (сервер обслуживает запросы в потоках).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["calculus_pool"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _worker_main(conn):
+    """Цикл процесса-вычислителя: принимает (операция, args, kwargs), отправляет (успех, значение)."""
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        op, args, kwargs = task
+        try:
+            outcome = (True, getattr(MathCalculator, op)(*args, **kwargs))
+        except BaseException as e:
+            outcome = (False, e)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # Результат или исключение не сериализуются — передаём текст ошибки
+            conn.send((False, RuntimeError(str(e))))
+    conn.close()
+
+
+class _Worker:
+    """Процесс-вычислитель и его канал связи."""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        # Не демон: операции с ограничением времени сами запускают дочерние процессы
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,))
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+def _kill_workers(workers: set):
+    """Завершает все процессы пула (вызывается при выходе из программы)."""
+    for worker in list(workers):
+        worker.kill()
+    workers.clear()
+
+
+class CallCancelled(Exception):
+    """Вызов был отменён через cancel_event."""
+
+
+class WorkerPool:
+    """
+    Пул из size процессов-вычислителей (по умолчанию — по числу процессоров).
+    timeout — ограничение времени одного вызова по умолчанию (None — без ограничения).
+    """
+
+    def __init__(self, size: int = None, timeout: float = None):
+        self.size = size or os.cpu_count() or 1
+        self.timeout = timeout
+        self._ctx = _pool_context()
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"calls": 0, "timeouts": 0, "cancelled": 0, "restarts": 0}
+        self._workers = set()
+        # Процессы не демонические, поэтому при выходе из программы их нужно остановить явно
+        multiprocessing.util.Finalize(self, _kill_workers, args=(self._workers,), exitpriority=10)
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _discard(self, worker, kill: bool):
+        with self._lock:
+            self._workers.discard(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _acquire(self, cancel_event):
+        while True:
+            if self._closed:
+                raise RuntimeError("пул вычислителей закрыт")
+            if cancel_event is not None and cancel_event.is_set():
+                self._count("cancelled")
+                raise CallCancelled("вычисление отменено")
+            try:
+                return self._idle.get(timeout=CANCEL_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+
+    def _release(self, worker, restart: bool = False):
+        if restart:
+            self._discard(worker, kill=True)
+            self._count("restarts")
+            if self._closed:
+                return
+            worker = self._spawn()
+        if self._closed:
+            self._discard(worker, kill=False)
+        else:
+            self._idle.put(worker)
+
+    def call(self, op: str, args=(), kwargs: dict = None, timeout: float = None, cancel_event=None):
+        """
+        Выполняет MathCalculator.<op>(*args, **kwargs) в свободном процессе пула.
+        Если свободных нет, ждёт освобождения. По истечении timeout секунд
+        (None — self.timeout) процесс завершается и возвращается TimeoutResult.
+        Если установлен cancel_event (threading.Event), вызов прерывается
+        с исключением CallCancelled. Исключения операции передаются вызывающему.
+        """
+        if op.startswith("_") or not callable(getattr(MathCalculator, op, None)):
+            raise ValueError(f"неизвестная операция: {op}")
+        if timeout is None:
+            timeout = self.timeout
+        worker = self._acquire(cancel_event)
+        self._count("calls")
+        try:
+            worker.conn.send((op, tuple(args), dict(kwargs or {})))
+        except Exception:
+            self._release(worker, restart=True)
+            raise
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            interval = CANCEL_CHECK_INTERVAL if cancel_event is not None else None
+            if deadline is not None:
+                left = max(deadline - time.monotonic(), 0)
+                interval = left if interval is None else min(interval, left)
+            try:
+                if worker.conn.poll(interval):
+                    break
+            except (EOFError, OSError):
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                self._count("cancelled")
+                self._release(worker, restart=True)
+                raise CallCancelled("вычисление отменено")
+            if deadline is not None and time.monotonic() >= deadline:
+                self._count("timeouts")
+                self._release(worker, restart=True)
+                return TimeoutResult(op, timeout)
+        try:
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            self._release(worker, restart=True)
+            raise RuntimeError("процесс вычисления завершился аварийно")
+        self._release(worker)
+        if ok:
+            return value
+        raise value
+
+    def info(self) -> dict:
+        """Возвращает размер пула, число свободных процессов и счётчики вызовов."""
+        with self._lock:
+            stats = dict(self._stats)
+        return {"size": self.size, "idle": self._idle.qsize(), **stats}
+
+    def close(self):
+        """Останавливает свободные процессы; занятые останавливаются по завершении вызова."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait(), kill=False)
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,174 @@
+"""
+calculus_server.py
+
+Локальный HTTP/JSON-сервис поверх MathCalculator. Вычисления выполняются
+в пуле заранее запущенных процессов (calculus_pool.WorkerPool):
+
+    python calculus_server.py --port 8000 --workers 4 --timeout 30
+
+Операции вызываются запросом POST с телом в JSON:
+
+    POST /derivative  {"expression": "sin(x)*x", "variable": "x"}
+    POST /integrate   {"expression": "x**2", "variable": "x", "lower": "0", "upper": "1"}
+    POST /calculate   {"expression": "x + 1", "substitutions": {"x": 3}}
+    POST /simplify    {"expression": "sin(x)**2 + cos(x)**2"}
+    POST /series      {"expression": "exp(x)", "variable": "x", "n": 6, "x0": 0}
+
+Поле "timeout" ограничивает время запроса (не больше --timeout сервера).
+Ответ: {"result": ...} или {"error": ...}; GET /stats — состояние пула.
+Одинаковые (с точностью до пробелов в выражениях) запросы, пришедшие во
+время вычисления, получают общий результат.
+"""
+
+import argparse
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from calculus_core import AnnotatedResult, MathCalculator, OPERATIONS, SingleFlight, json_default
+from calculus_pool import WorkerPool
+
+MAX_BODY_BYTES = 1 << 20
+
+
+class CalculusServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер с пулом вычислителей. max_pending ограничивает число запросов,
+    ожидающих или выполняющихся одновременно; сверх него отвечает 503.
+    timeout — предельное время вычисления одного запроса, с.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, pool: WorkerPool, timeout: float = 30, max_pending: int = 64):
+        super().__init__(address, CalculusRequestHandler)
+        self.pool = pool
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.single_flight = SingleFlight()
+
+    def compute(self, endpoint: str, payload: dict):
+        """Проверяет поля запроса и выполняет операцию; возвращает (HTTP-статус, тело ответа)."""
+        method, required, optional = OPERATIONS[endpoint]
+        missing = [name for name in required if name not in payload]
+        if missing:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Ошибка: не заданы поля {', '.join(missing)}"}
+        unknown = set(payload) - set(required) - set(optional) - {"timeout"}
+        if unknown:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Ошибка: неизвестные поля {', '.join(sorted(unknown))}"}
+        timeout = self.timeout
+        if payload.get("timeout") is not None:
+            try:
+                requested = float(payload["timeout"])
+            except (TypeError, ValueError):
+                return HTTPStatus.BAD_REQUEST, {"error": "Ошибка: timeout должен быть числом"}
+            if not requested > 0:
+                return HTTPStatus.BAD_REQUEST, {"error": "Ошибка: timeout должен быть положительным"}
+            timeout = min(requested, timeout) if timeout else requested
+        args = [payload[name] for name in required]
+        kwargs = {name: payload[name] for name in optional if name in payload}
+
+        try:
+            key = MathCalculator.normalized_key(method, args + [kwargs, timeout])
+            result = self.single_flight.do(key, lambda: self.pool.call(method, args, kwargs, timeout=timeout))
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Ошибка: {str(e)}"}
+        return self.format_response(result)
+
+    @staticmethod
+    def format_response(result):
+        if isinstance(result, tuple):
+            # calculate возвращает (строка выражения, значение) или (ошибка, None)
+            text, value = result
+            if value is None:
+                return HTTPStatus.BAD_REQUEST, {"error": text}
+            return HTTPStatus.OK, {"result": str(value), "expression": text}
+        text = str(result)
+        info = result.info if isinstance(result, AnnotatedResult) else {}
+        if info.get("status") == "timeout":
+            return HTTPStatus.GATEWAY_TIMEOUT, {"error": text}
+        if text.startswith("Ошибка"):
+            return HTTPStatus.BAD_REQUEST, {"error": text}
+        body = {"result": text}
+        if info:
+            body["info"] = info
+        return HTTPStatus.OK, body
+
+    def stats(self) -> dict:
+        return {"pool": self.pool.info(), "single_flight": self.single_flight.info()}
+
+
+class CalculusRequestHandler(BaseHTTPRequestHandler):
+    server_version = "CalculusServer/1.0"
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False, default=json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(HTTPStatus.OK, self.server.stats())
+        else:
+            self.send_json(HTTPStatus.NOT_FOUND, {"error": "Ошибка: неизвестный адрес"})
+
+    def do_POST(self):
+        endpoint = self.path.strip("/")
+        if endpoint not in OPERATIONS:
+            self.send_json(HTTPStatus.NOT_FOUND, {"error": "Ошибка: неизвестная операция"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_json(HTTPStatus.BAD_REQUEST, {"error": "Ошибка: некорректный заголовок Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            self.send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Ошибка: слишком большой запрос"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(HTTPStatus.BAD_REQUEST, {"error": "Ошибка: тело запроса должно быть в формате JSON"})
+            return
+        if not isinstance(payload, dict):
+            self.send_json(HTTPStatus.BAD_REQUEST, {"error": "Ошибка: тело запроса должно быть объектом JSON"})
+            return
+        if not self.server.slots.acquire(blocking=False):
+            self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Ошибка: сервер перегружен"})
+            return
+        try:
+            status, body = self.server.compute(endpoint, payload)
+        finally:
+            self.server.slots.release()
+        self.send_json(status, body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON-сервис символьного калькулятора")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="число процессов-вычислителей")
+    parser.add_argument("--timeout", type=float, default=30, help="предельное время запроса, с")
+    parser.add_argument("--max-pending", type=int, default=64, help="предельное число одновременных запросов")
+    args = parser.parse_args(argv)
+
+    pool = WorkerPool(args.workers)
+    server = CalculusServer((args.host, args.port), pool, timeout=args.timeout, max_pending=args.max_pending)
+    print(f"Сервер запущен на http://{args.host}:{server.server_port} (вычислителей: {pool.size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+calculus_store.py
+
+Постоянное хранилище результатов вычислений MathCalculator на базе SQLite.
+Используется как бэкенд кэша результатов:
+
+    MathCalculator.enable_result_cache(store="results.sqlite")
+
+Записи адресуются по содержимому: ключ — SHA-256 от канонического
+(srepr-нормализованного) ключа операции. Сведения AnnotatedResult.info
+хранятся рядом с результатом в JSON. Размер хранилища ограничен,
+при превышении вытесняются записи, к которым дольше всего не обращались.
+
+Запуск из командной строки позволяет заранее прогреть хранилище:
+
+    python calculus_store.py prewarm results.sqlite expressions.txt --operation integrate
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+from calculus_core import AnnotatedResult, MathCalculator, json_default
+
+
+class SQLiteResultStore:
+    """
+    Хранилище результатов в файле SQLite с адресацией по хешу ключа.
+    max_bytes — предельный суммарный размер результатов (None — без ограничения).
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "digest TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL, info TEXT)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+            if "info" not in columns:
+                # Хранилище создано до появления сведений о вычислении
+                self._conn.execute("ALTER TABLE entries ADD COLUMN info TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_access ON entries (last_access)")
+        self._total_bytes = self._stored_bytes()
+
+    @staticmethod
+    def digest(key: str) -> str:
+        """Возвращает адрес записи — SHA-256 от канонического ключа."""
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str):
+        """
+        Возвращает сохранённый результат (AnnotatedResult, если были сохранены
+        сведения info) или None; обновляет время последнего обращения.
+        """
+        digest = self.digest(key)
+        with self._lock:
+            row = self._conn.execute("SELECT value, info FROM entries WHERE digest = ?", (digest,)).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE entries SET last_access = ? WHERE digest = ?", (time.time(), digest)
+                )
+        value, info = row
+        return value if info is None else AnnotatedResult(value, **json.loads(info))
+
+    def put(self, key: str, value: str):
+        """Сохраняет результат и при необходимости вытесняет давно не использованные записи."""
+        info = getattr(value, "info", None)
+        info = None if info is None else json.dumps(info, ensure_ascii=False, default=json_default)
+        value = str(value)
+        size = len(value.encode("utf-8")) + (len(info.encode("utf-8")) if info is not None else 0)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (digest, value, size, last_access, info) VALUES (?, ?, ?, ?, ?)",
+                (self.digest(key), value, size, time.time(), info),
+            )
+            self._total_bytes += size
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Удаляет записи в порядке давности обращения, пока размер не уложится в лимит."""
+        # Хранилище может совместно использоваться несколькими процессами,
+        # поэтому перед вытеснением берётся фактический размер
+        self._total_bytes = self._stored_bytes()
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT digest, size FROM entries ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for digest, size in rows:
+                self._conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def clear(self):
+        """Удаляет все сохранённые результаты."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._total_bytes = 0
+
+    def info(self) -> dict:
+        """Возвращает число записей и их суммарный размер."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "max_bytes": self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def prewarm(store: SQLiteResultStore, lines, operation: str = "integrate", variable: str = "x",
+            n: int = 5, x0: str = "0", out=sys.stderr) -> int:
+    """
+    Вычисляет операцию для каждого выражения из lines и сохраняет результаты в store.
+    Пустые строки и строки, начинающиеся с '#', пропускаются. Возвращает число
+    обработанных выражений.
+    """
+    calls = {
+        "derivative": lambda e: MathCalculator.derivative(e, variable),
+        "integrate": lambda e: MathCalculator.integrate(e, variable),
+        "simplify": lambda e: MathCalculator.simplify_expression(e),
+        "series": lambda e: MathCalculator.series_expansion(e, variable, n, x0),
+    }
+    call = calls[operation]
+    previous = MathCalculator.result_cache
+    MathCalculator.enable_result_cache(maxsize=0, store=store)
+    count = 0
+    try:
+        for line in lines:
+            expression = line.strip()
+            if not expression or expression.startswith("#"):
+                continue
+            started = time.perf_counter()
+            result = call(expression)
+            count += 1
+            print(f"{expression}: {result} ({time.perf_counter() - started:.3f} с)", file=out)
+    finally:
+        MathCalculator.result_cache = previous
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Постоянное хранилище результатов MathCalculator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    warm = commands.add_parser("prewarm", help="вычислить и сохранить результаты для списка выражений")
+    warm.add_argument("database", help="путь к файлу SQLite")
+    warm.add_argument("expressions", nargs="?", default="-", help="файл с выражениями по одному в строке ('-' — stdin)")
+    warm.add_argument("--operation", choices=["derivative", "integrate", "simplify", "series"], default="integrate")
+    warm.add_argument("--variable", default="x")
+    warm.add_argument("--order", type=int, default=5, help="порядок разложения для series")
+    warm.add_argument("--point", default="0", help="точка разложения для series")
+    warm.add_argument("--max-bytes", type=int, default=256 * 1024 * 1024)
+
+    info = commands.add_parser("info", help="показать размер хранилища")
+    info.add_argument("database")
+
+    clear = commands.add_parser("clear", help="удалить все записи")
+    clear.add_argument("database")
+
+    args = parser.parse_args(argv)
+    if args.command == "prewarm":
+        store = SQLiteResultStore(args.database, max_bytes=args.max_bytes)
+        source = sys.stdin if args.expressions == "-" else open(args.expressions, encoding="utf-8")
+        try:
+            count = prewarm(store, source, args.operation, args.variable, args.order, args.point)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        print(f"Обработано выражений: {count}; {store.info()}")
+    else:
+        store = SQLiteResultStore(args.database)
+        if args.command == "clear":
+            store.clear()
+        print(store.info())
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
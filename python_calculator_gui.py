@@ -1,6 +1,58 @@
+import math
+import queue
+import re
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
-from calculus_core import MathCalculator
+from collections import deque
+from itertools import accumulate, repeat
+from tkinter import ttk, messagebox, filedialog
+from calculus_core import MathCalculator, KillableCall, ParseCache
+
+# Период опроса фонового вычисления, мс
+POLL_INTERVAL = 50
+# Задержки живого предпросмотра после последнего нажатия клавиши, мс:
+# разбор и вычисление значения — быстро, тяжёлые операции — после паузы
+PREVIEW_DELAY = 150
+HEAVY_PREVIEW_DELAY = 700
+# Предельное время фонового вычисления для предпросмотра, с: разбор и значение,
+# затем тяжёлая операция
+QUICK_PREVIEW_TIMEOUT = 1
+PREVIEW_TIMEOUT = 5
+PREVIEW_MAX_CHARS = 200
+# Результаты длиннее RESULT_PREVIEW_CHARS показываются частично и догружаются страницами
+RESULT_PREVIEW_CHARS = 5000
+RESULT_PAGE_CHARS = 20000
+EXPORT_CHUNK_CHARS = 1 << 20
+# Размер холста графика, пиксели
+PLOT_WIDTH = 640
+PLOT_HEIGHT = 400
+PLOT_MARGIN = 10
+# Предельное время разбора выражения графика в фоновом процессе, с
+PLOT_PARSE_TIMEOUT = 5
+
+_FUNCTION_CALL_RE = re.compile(r"\w\(")
+_PAREN_STEP = {"(": 1, ")": -1}
+_KEEP_PARENS = {code: None for code in range(128) if chr(code) not in "()"}
+
+
+def quick_preview_text(expression, calculate_args=None):
+    """
+    Выполняется в фоновом процессе: разбирает выражение и, если заданы аргументы
+    calculate, вычисляет значение. Возвращает (текст предпросмотра, результат
+    разбора) — пару (выражение, ошибка) для кэша разбора окна.
+    """
+    parsed = MathCalculator.parse_expression(expression)
+    expr, error = parsed
+    if error:
+        return error, parsed
+    text = f"Разбор: {expr}"
+    if calculate_args is None:
+        return text + "\n…", parsed
+    _, value = MathCalculator.calculate(*calculate_args, compiled=True)
+    if value is not None:
+        text += f"\nЗначение: {value}"
+    return text, parsed
+
 
 class CalculatorGUI:
 
@@ -32,7 +84,23 @@ class CalculatorGUI:
             }
         }
 
+        # Очередь запросов и текущее фоновое вычисление
+        self.pending = deque()
+        self.current_job = None
+        self.current_call = None
+
+        # Состояние живого предпросмотра
+        self.preview_after_ids = []
+        self.preview_call = None
+        self.preview_params = None
+        self.preview_polls_left = 0
+
+        # Полный текст последнего результата и число уже показанных символов
+        self.full_result = ""
+        self.shown_chars = 0
+
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
         # Выпадающий список выбора операции
@@ -48,12 +116,30 @@ class CalculatorGUI:
         
         self.param_entries = []
 
-        # Кнопка вычислить
-        self.calc_button = tk.Button(self.root, text="Вычислить", command=self.calculate)
-        self.calc_button.grid(row=2, column=0, columnspan=2, pady=5)
+        # Кнопки вычислить/отменить и индикатор занятости
+        buttons_frame = tk.Frame(self.root)
+        buttons_frame.grid(row=2, column=0, columnspan=2, pady=5, sticky="ew")
+        self.calc_button = tk.Button(buttons_frame, text="Вычислить", command=self.calculate)
+        self.calc_button.pack(side="left", padx=2)
+        self.cancel_button = tk.Button(buttons_frame, text="Отмена", command=self.cancel, state="disabled")
+        self.cancel_button.pack(side="left", padx=2)
+        tk.Button(buttons_frame, text="График", command=self.open_plot).pack(side="left", padx=2)
+        self.progress = ttk.Progressbar(buttons_frame, mode="indeterminate", length=120)
+        self.progress.pack(side="left", padx=5)
+        self.live_preview = tk.BooleanVar(value=False)
+        tk.Checkbutton(buttons_frame, text="Живой предпросмотр", variable=self.live_preview,
+                       command=self.schedule_preview).pack(side="left", padx=2)
+        self.status_var = tk.StringVar(value="Готово")
+        tk.Label(buttons_frame, textvariable=self.status_var, anchor="w").pack(side="left", fill="x", expand=True)
 
-        # Текстовое поле результата
-        tk.Label(self.root, text="Результат:").grid(row=3, column=0, sticky="nw")
+        # Текстовое поле результата с кнопками догрузки и экспорта
+        result_frame = tk.Frame(self.root)
+        result_frame.grid(row=3, column=0, sticky="nw")
+        tk.Label(result_frame, text="Результат:").pack(anchor="w")
+        self.more_button = tk.Button(result_frame, text="Показать ещё", command=self.show_more, state="disabled")
+        self.more_button.pack(anchor="w", fill="x")
+        self.export_button = tk.Button(result_frame, text="Сохранить…", command=self.export_result, state="disabled")
+        self.export_button.pack(anchor="w", fill="x")
         self.result_text = tk.Text(self.root, height=6, width=50, wrap="word")
         self.result_text.grid(row=3, column=1, sticky="ew")
 
@@ -62,6 +148,12 @@ class CalculatorGUI:
         self.desc_text = tk.Text(self.root, height=8, width=50, wrap="word", bg="#f0f0f0")
         self.desc_text.grid(row=4, column=1, sticky="ew")
 
+        # Строка живого предпросмотра
+        tk.Label(self.root, text="Предпросмотр:").grid(row=5, column=0, sticky="nw")
+        self.preview_var = tk.StringVar()
+        tk.Label(self.root, textvariable=self.preview_var, anchor="w", justify="left",
+                 wraplength=400).grid(row=5, column=1, sticky="ew")
+
         self.root.columnconfigure(1, weight=1)
         self.op_combobox.current(0)
         self.update_params()
@@ -80,10 +172,13 @@ class CalculatorGUI:
             lbl.grid(row=i, column=0, sticky="w")
             ent = tk.Entry(self.params_frame, width=40)
             ent.grid(row=i, column=1, sticky="ew", pady=2)
+            ent.bind("<KeyRelease>", self.schedule_preview)
             self.param_entries.append(ent)
 
             # Подсказки в описание операции
         self.set_description(op)
+        self.preview_params = None
+        self.schedule_preview()
 
     def set_description(self, operation):
         descriptions = {
@@ -96,61 +191,510 @@ class CalculatorGUI:
         self.desc_text.delete("1.0", tk.END)
         self.desc_text.insert(tk.END, descriptions.get(operation, ""))
 
+    def build_job(self, op, params):
+        """Проверяет параметры и возвращает (функция, аргументы) для вычисления."""
+        func = self.operations[op]["func"]
+        if op == "Производная":
+            if len(params) < 2 or not params[0] or not params[1]:
+                raise ValueError("Введите выражение и переменную.")
+            return func, (params[0], params[1])
+
+        elif op == "Интеграл":
+            if len(params) < 2 or not params[0] or not params[1]:
+                raise ValueError("Введите выражение и переменную.")
+            lower = params[2] if len(params) > 2 and params[2] else None
+            upper = params[3] if len(params) > 3 and params[3] else None
+            return func, (params[0], params[1], lower, upper)
+
+        elif op == "Вычислить выражение":
+            expr = params[0]
+            substitutions = {}
+            if len(params) > 1 and params[1]:
+                # Разбор подстановок переменных вида x=2,y=3
+                try:
+                    pairs = [item.strip() for item in params[1].split(",")]
+                    for pair in pairs:
+                        var, val = pair.split("=")
+                        substitutions[var.strip()] = float(val.strip())
+                except Exception:
+                    raise ValueError("Неверный формат подстановок (пример: x=2,y=3)")
+            return func, (expr, substitutions)
+
+        elif op == "Упростить":
+            if not params[0]:
+                raise ValueError("Введите выражение.")
+            return func, (params[0],)
+
+        elif op == "Ряд Тейлора":
+            if len(params) < 3 or not params[0] or not params[1] or not params[2]:
+                raise ValueError("Введите выражение, переменную и порядок.")
+            n = int(params[2])
+            x0 = float(params[3]) if len(params) > 3 and params[3] else 0
+            return func, (params[0], params[1], n, x0)
+
+        raise ValueError("Неизвестная операция.")
+
+    @staticmethod
+    def format_result(op, result):
+        # calculate возвращает кортеж (строка, число)
+        if op == "Вычислить выражение" and isinstance(result, tuple):
+            return f"Выражение: {result[0]}\nЗначение: {result[1]}"
+        return str(result)
+
     def calculate(self):
         op = self.op_var.get()
-        func = self.operations[op]["func"]
         params = [e.get().strip() for e in self.param_entries]
+        try:
+            func, args = self.build_job(op, params)
+        except Exception as e:
+            self.show_result(f"Ошибка: {str(e)}")
+            return
+        # Вычисление ставится в очередь и выполняется в отдельном процессе,
+        # поэтому окно не блокируется и задачу можно прервать
+        self.pending.append((op, func, args))
+        if self.current_call is None:
+            self.start_next()
+        else:
+            self.update_status()
 
+    def start_next(self):
+        if not self.pending:
+            self.current_job = self.current_call = None
+            self.progress.stop()
+            self.cancel_button.config(state="disabled")
+            self.update_status()
+            return
+        op, func, args = self.pending.popleft()
+        self.current_job = op
         try:
-            if op == "Производная":
-                if len(params) < 2 or not params[0] or not params[1]:
-                    raise ValueError("Введите выражение и переменную.")
-                result = func(params[0], params[1])
-
-            elif op == "Интеграл":
-                if len(params) < 2 or not params[0] or not params[1]:
-                    raise ValueError("Введите выражение и переменную.")
-                lower = params[2] if len(params) > 2 and params[2] else None
-                upper = params[3] if len(params) > 3 and params[3] else None
-                result = func(params[0], params[1], lower, upper)
-
-            elif op == "Вычислить выражение":
-                expr = params[0]
-                substitutions = {}
-                if len(params) > 1 and params[1]:
-                    # Разбор подстановок переменных вида x=2,y=3
-                    try:
-                        pairs = [item.strip() for item in params[1].split(",")]
-                        for pair in pairs:
-                            var, val = pair.split("=")
-                            substitutions[var.strip()] = float(val.strip())
-                    except Exception:
-                        raise ValueError("Неверный формат подстановок (пример: x=2,y=3)")
-                result = func(expr, substitutions)
-
-                # result возвращает кортеж (строка, число)
-                if isinstance(result, tuple):
-                    result = f"Выражение: {result[0]}\nЗначение: {result[1]}"
-
-            elif op == "Упростить":
-                if not params[0]:
-                    raise ValueError("Введите выражение.")
-                result = func(params[0])
-
-            elif op == "Ряд Тейлора":
-                if len(params) < 3 or not params[0] or not params[1] or not params[2]:
-                    raise ValueError("Введите выражение, переменную и порядок.")
-                n = int(params[2])
-                x0 = float(params[3]) if len(params) > 3 and params[3] else 0
-                result = func(params[0], params[1], n, x0)
+            self.current_call = KillableCall(func, *args)
+        except Exception as e:
+            self.current_call = None
+            self.show_result(f"Ошибка: не удалось запустить вычисление ({str(e)})")
+            self.root.after_idle(self.start_next)
+            return
+        self.progress.start(10)
+        self.cancel_button.config(state="normal")
+        self.update_status()
+        self.root.after(POLL_INTERVAL, self.poll)
 
-            else:
-                result = "Неизвестная операция."
+    def poll(self):
+        call = self.current_call
+        if call is None:
+            return
+        if not call.done():
+            self.root.after(POLL_INTERVAL, self.poll)
+            return
+        try:
+            result = self.format_result(self.current_job, call.result())
         except Exception as e:
             result = f"Ошибка: {str(e)}"
+        self.show_result(result)
+        self.start_next()
+
+    def cancel(self):
+        """Прерывает текущее вычисление и переходит к следующему в очереди."""
+        if self.current_call is None:
+            return
+        self.current_call.cancel()
+        self.show_result(f"Вычисление «{self.current_job}» отменено.")
+        self.current_call = None
+        self.start_next()
 
+    def update_status(self):
+        if self.current_job is None:
+            self.status_var.set("Готово")
+        else:
+            queued = f" (в очереди: {len(self.pending)})" if self.pending else ""
+            self.status_var.set(f"Выполняется: {self.current_job}{queued}")
+
+    @staticmethod
+    def result_summary(text):
+        """Дешёвая сводка по строке результата: длина, число операций и глубина вложенности скобок."""
+        parens = text.translate(_KEEP_PARENS)
+        max_depth = max(accumulate(map(_PAREN_STEP.get, parens, repeat(0))), default=0)
+        operations = sum(text.count(op) for op in "+-*/") - text.count("**") + len(_FUNCTION_CALL_RE.findall(text))
+        return f"[Длина: {len(text)} симв., операций: ≈{operations}, глубина вложенности: {max_depth}]"
+
+    def show_result(self, text):
+        """
+        Выводит результат. Длинный результат не вставляется в виджет целиком:
+        показываются сводка и первые RESULT_PREVIEW_CHARS символов, остальное
+        догружается страницами или сохраняется в файл.
+        """
+        self.full_result = text
         self.result_text.delete("1.0", tk.END)
-        self.result_text.insert(tk.END, str(result))
+        if len(text) <= RESULT_PREVIEW_CHARS:
+            self.shown_chars = len(text)
+            self.result_text.insert(tk.END, text)
+        else:
+            self.shown_chars = RESULT_PREVIEW_CHARS
+            self.result_text.insert(tk.END, self.result_summary(text) + "\n")
+            self.result_text.insert(tk.END, text[:RESULT_PREVIEW_CHARS])
+        self.update_result_buttons()
+
+    def show_more(self):
+        """Добавляет в виджет следующую страницу длинного результата."""
+        end = self.shown_chars + RESULT_PAGE_CHARS
+        self.result_text.insert(tk.END, self.full_result[self.shown_chars:end])
+        self.shown_chars = min(end, len(self.full_result))
+        self.update_result_buttons()
+
+    def update_result_buttons(self):
+        remaining = len(self.full_result) - self.shown_chars
+        self.more_button.config(state="normal" if remaining > 0 else "disabled",
+                                text=f"Показать ещё ({remaining})" if remaining > 0 else "Показать ещё")
+        self.export_button.config(state="normal" if self.full_result else "disabled")
+
+    def export_result(self):
+        """Сохраняет полный результат в файл порциями, минуя текстовый виджет."""
+        path = filedialog.asksaveasfilename(defaultextension=".txt",
+                                            filetypes=[("Текст", "*.txt"), ("Все файлы", "*.*")])
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                for start in range(0, len(self.full_result), EXPORT_CHUNK_CHARS):
+                    f.write(self.full_result[start:start + EXPORT_CHUNK_CHARS])
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {e}")
+
+    def schedule_preview(self, event=None):
+        """Откладывает предпросмотр до паузы в наборе и отменяет устаревшие вычисления."""
+        for after_id in self.preview_after_ids:
+            self.root.after_cancel(after_id)
+        self.preview_after_ids = []
+        if not self.live_preview.get():
+            self.cancel_preview()
+            self.preview_var.set("")
+            return
+        params = (self.op_var.get(), tuple(e.get().strip() for e in self.param_entries))
+        if params == self.preview_params:
+            # Поля не изменились — предпросмотр актуален
+            return
+        self.cancel_preview()
+        self.preview_params = params
+        self.preview_after_ids = [self.root.after(PREVIEW_DELAY, self.quick_preview, params)]
+
+    def quick_preview(self, params):
+        """
+        Дешёвая часть предпросмотра: разбор выражения и вычисление значения.
+        Даже разбор может длиться долго (например, 7**7**9), поэтому он идёт
+        в фоновом процессе с коротким ограничением времени. Результат разбора
+        сохраняется в кэше окна: неизменённые поля повторно не разбираются,
+        а фоновые вычисления получают кэш при запуске процесса.
+        """
+        op, values = params
+        if params != self.preview_params:
+            return
+        if not values or not values[0]:
+            self.preview_var.set("")
+            return
+        calculate_args = None
+        if op == "Вычислить выражение":
+            try:
+                _, calculate_args = self.build_job(op, list(values))
+            except Exception:
+                pass
+        elif MathCalculator.parse_cache.get(ParseCache.make_key(values[0], {})) is not None:
+            # Выражение уже разобрано — предпросмотр строится без фонового процесса
+            self.show_quick_preview(params, *quick_preview_text(values[0]))
+            return
+        self.preview_call = KillableCall(quick_preview_text, values[0], calculate_args)
+        self.preview_polls_left = QUICK_PREVIEW_TIMEOUT * 1000 // POLL_INTERVAL
+        self.root.after(POLL_INTERVAL, self.poll_quick_preview, params)
+
+    def poll_quick_preview(self, params):
+        call = self.preview_call
+        if call is None or params != self.preview_params:
+            return
+        if not call.done():
+            self.preview_polls_left -= 1
+            if self.preview_polls_left <= 0:
+                self.cancel_preview()
+                self.preview_var.set("Разбор занимает слишком долго — нажмите «Вычислить»")
+            else:
+                self.root.after(POLL_INTERVAL, self.poll_quick_preview, params)
+            return
+        self.preview_call = None
+        try:
+            text, parsed = call.result()
+        except Exception as e:
+            self.preview_var.set(self.truncate_preview(f"Ошибка: {str(e)}"))
+            return
+        MathCalculator.parse_cache.put(ParseCache.make_key(params[1][0], {}), parsed)
+        self.show_quick_preview(params, text, parsed)
+
+    def show_quick_preview(self, params, text, parsed):
+        self.preview_var.set(self.truncate_preview(text))
+        if parsed[1] is None and params[0] != "Вычислить выражение":
+            self.preview_after_ids.append(
+                self.root.after(HEAVY_PREVIEW_DELAY - PREVIEW_DELAY, self.heavy_preview, params)
+            )
+
+    def heavy_preview(self, params):
+        """Тяжёлая часть предпросмотра выполняется в фоновом процессе после паузы в наборе."""
+        op, values = params
+        if params != self.preview_params:
+            return
+        try:
+            func, args = self.build_job(op, list(values))
+            self.preview_call = KillableCall(func, *args)
+        except Exception:
+            return
+        self.preview_polls_left = PREVIEW_TIMEOUT * 1000 // POLL_INTERVAL
+        self.root.after(POLL_INTERVAL, self.poll_preview, params)
+
+    def poll_preview(self, params):
+        call = self.preview_call
+        if call is None or params != self.preview_params:
+            return
+        if not call.done():
+            self.preview_polls_left -= 1
+            if self.preview_polls_left <= 0:
+                self.cancel_preview()
+                self.preview_var.set(self.preview_var.get().replace("…", "(слишком долго — нажмите «Вычислить»)"))
+            else:
+                self.root.after(POLL_INTERVAL, self.poll_preview, params)
+            return
+        self.preview_call = None
+        try:
+            result = self.format_result(op=params[0], result=call.result())
+        except Exception as e:
+            result = f"Ошибка: {str(e)}"
+        expr_line = self.preview_var.get().split("\n")[0]
+        self.preview_var.set(self.truncate_preview(f"{expr_line}\nРезультат: {result}"))
+
+    def cancel_preview(self):
+        if self.preview_call is not None:
+            self.preview_call.cancel()
+            self.preview_call = None
+
+    @staticmethod
+    def truncate_preview(text):
+        if len(text) > PREVIEW_MAX_CHARS:
+            return text[:PREVIEW_MAX_CHARS] + "…"
+        return text
+
+    def open_plot(self):
+        params = [ent.get().strip() for ent in self.param_entries]
+        expression = params[0] if params else ""
+        variable = params[1] if len(params) > 1 and self.op_var.get() != "Вычислить выражение" else "x"
+        PlotWindow(self.root, expression, variable or "x")
+
+    def on_close(self):
+        self.pending.clear()
+        self.cancel_preview()
+        if self.current_call is not None:
+            self.current_call.cancel()
+        self.root.destroy()
+
+
+class PlotWindow(tk.Toplevel):
+    """
+    Окно графика функции одной переменной. Точки вычисляются в фоновом
+    потоке адаптивной выборкой: сначала рисуется грубый график, затем он
+    уточняется по мере поступления новых точек, не блокируя интерфейс.
+    """
+
+    def __init__(self, master, expression="", variable="x", a="-10", b="10"):
+        super().__init__(master)
+        self.title("График функции")
+        self.snapshots = queue.Queue()
+        self.stop_event = None
+        self.poll_id = None
+        self.parse_call = None
+        self.parse_polls_left = 0
+
+        fields = tk.Frame(self)
+        fields.pack(fill="x", padx=5, pady=5)
+        self.entries = {}
+        for column, (name, label, value, width) in enumerate([
+            ("expression", "f =", expression, 30),
+            ("variable", "по", variable, 4),
+            ("a", "от", a, 6),
+            ("b", "до", b, 6),
+        ]):
+            tk.Label(fields, text=label).grid(row=0, column=2 * column)
+            ent = tk.Entry(fields, width=width)
+            ent.insert(0, value)
+            ent.grid(row=0, column=2 * column + 1, padx=2)
+            ent.bind("<Return>", self.plot)
+            self.entries[name] = ent
+        tk.Button(fields, text="Построить", command=self.plot).grid(row=0, column=8, padx=5)
+
+        self.canvas = tk.Canvas(self, width=PLOT_WIDTH, height=PLOT_HEIGHT, bg="white")
+        self.canvas.pack(fill="both", expand=True)
+        self.status_var = tk.StringVar()
+        tk.Label(self, textvariable=self.status_var, anchor="w").pack(fill="x")
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        if expression:
+            self.plot()
+
+    def plot(self, event=None):
+        self.stop()
+        values = {name: ent.get().strip() for name, ent in self.entries.items()}
+        try:
+            a, b = float(values["a"]), float(values["b"])
+        except ValueError:
+            self.status_var.set("Ошибка: границы отрезка должны быть числами")
+            return
+        if not a < b:
+            self.status_var.set("Ошибка: левая граница должна быть меньше правой")
+            return
+        self.status_var.set("Построение…")
+        args = (values["expression"], values["variable"], a, b)
+        if MathCalculator.parse_cache.get(ParseCache.make_key(values["expression"], {})) is not None:
+            self.start_sampling(args)
+            return
+        # Разбор может надолго занять интерпретатор (например, 7**7**9) и в потоке
+        # заблокировал бы окно, поэтому он идёт в процессе с ограничением времени
+        self.parse_call = KillableCall(MathCalculator.parse_expression, values["expression"])
+        self.parse_polls_left = PLOT_PARSE_TIMEOUT * 1000 // POLL_INTERVAL
+        self.poll_id = self.after(POLL_INTERVAL, self.poll_parse, args)
+
+    def poll_parse(self, args):
+        call = self.parse_call
+        if not call.done():
+            self.parse_polls_left -= 1
+            if self.parse_polls_left <= 0:
+                self.stop()
+                self.status_var.set("Ошибка: разбор выражения занимает слишком долго")
+            else:
+                self.poll_id = self.after(POLL_INTERVAL, self.poll_parse, args)
+            return
+        self.parse_call = None
+        try:
+            parsed = call.result()
+        except Exception as e:
+            self.poll_id = None
+            self.status_var.set(f"Ошибка: {str(e)}")
+            return
+        MathCalculator.parse_cache.put(ParseCache.make_key(args[0], {}), parsed)
+        self.start_sampling(args)
+
+    def start_sampling(self, args):
+        self.stop_event = threading.Event()
+        self.snapshots = queue.Queue()
+        threading.Thread(target=self.sample, args=(*args, self.stop_event, self.snapshots), daemon=True).start()
+        self.poll_id = self.after(POLL_INTERVAL, self.poll)
+
+    @staticmethod
+    def sample(expression, variable, a, b, stop_event, snapshots):
+        # Выполняется в фоновом потоке вместе с компиляцией выражения (разбор уже
+        # в кэше); с виджетами работает только главный поток, ошибки передаются
+        # через очередь строкой
+        try:
+            samples, error = MathCalculator.adaptive_samples(expression, variable, a, b)
+            if error:
+                snapshots.put(error)
+                samples = ()
+            for snapshot in samples:
+                if stop_event.is_set():
+                    return
+                snapshots.put(snapshot)
+        except Exception as e:
+            snapshots.put(f"Ошибка построения: {str(e)}")
+        snapshots.put(None)
+
+    def poll(self):
+        # Промежуточные выборки, накопившиеся между опросами, пропускаются — рисуется последняя
+        latest, finished = None, False
+        try:
+            while True:
+                item = self.snapshots.get_nowait()
+                if item is None:
+                    finished = True
+                else:
+                    latest = item
+        except queue.Empty:
+            pass
+        if isinstance(latest, str):
+            self.status_var.set(latest)
+            finished = True
+        elif latest is not None:
+            xs, ys = latest
+            self.draw(xs, ys)
+            self.status_var.set(f"Точек: {len(xs)}" + ("" if finished else " (уточнение…)"))
+        if finished:
+            self.poll_id = None
+        else:
+            self.poll_id = self.after(POLL_INTERVAL, self.poll)
+
+    def draw(self, xs, ys):
+        self.canvas.delete("all")
+        width = max(self.canvas.winfo_width(), 2 * PLOT_MARGIN + 1)
+        height = max(self.canvas.winfo_height(), 2 * PLOT_MARGIN + 1)
+        for line in self.plot_lines(xs, ys, width, height):
+            if len(line) >= 4:
+                self.canvas.create_line(*line, fill="blue")
+            else:
+                px, py = line
+                self.canvas.create_oval(px - 1, py - 1, px + 1, py + 1, fill="blue", outline="")
+
+    @staticmethod
+    def plot_lines(xs, ys, width, height):
+        """
+        Переводит точки в координаты холста и разбивает график на ломаные:
+        разрывы — в точках вне области определения и на скачках через весь
+        холст. Масштаб по y берётся по 2–98 процентилям, чтобы полюса не
+        сплющивали график. В пределах одного столбца пикселей остаются только
+        точки, расширяющие уже нарисованный отрезок.
+        """
+        finite = sorted(y for y in ys.tolist() if math.isfinite(y))
+        if not finite:
+            return []
+        low = finite[int(0.02 * (len(finite) - 1))]
+        high = finite[int(0.98 * (len(finite) - 1))]
+        if high - low < 1e-12:
+            low, high = low - 1, high + 1
+        pad = (high - low) * 0.05
+        low, high = low - pad, high + pad
+        x0, x1 = float(xs[0]), float(xs[-1])
+        sx = (width - 2 * PLOT_MARGIN) / ((x1 - x0) or 1)
+        sy = (height - 2 * PLOT_MARGIN) / (high - low)
+
+        lines, current, last, column = [], [], None, None
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            if not math.isfinite(y):
+                if current:
+                    lines.append(current)
+                current, last = [], None
+                continue
+            px = round(PLOT_MARGIN + (x - x0) * sx)
+            py = round(height - PLOT_MARGIN - (y - low) * sy)
+            py = min(max(py, -height), 2 * height)
+            if last is not None:
+                if abs(py - last[1]) > height:
+                    lines.append(current)
+                    current = []
+                elif px == last[0] and column[0] <= py <= column[1]:
+                    continue
+            if last is None or px != last[0]:
+                column = [py, py]
+            else:
+                column = [min(column[0], py), max(column[1], py)]
+            current.extend((px, py))
+            last = (px, py)
+        if current:
+            lines.append(current)
+        return lines
+
+    def stop(self):
+        if self.parse_call is not None:
+            self.parse_call.cancel()
+            self.parse_call = None
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.stop_event = None
+        if self.poll_id is not None:
+            self.after_cancel(self.poll_id)
+            self.poll_id = None
+
+    def on_close(self):
+        self.stop()
+        self.destroy()
 
 
 if __name__ == "__main__":